@@ -1,5 +1,8 @@
 """MQTT Client for simulation bridge."""
 
+import argparse
+import asyncio
+import functools
 import os
 import ssl
 import json
@@ -7,6 +10,10 @@ import sys
 import yaml
 import paho.mqtt.client as mqtt
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# pylint: disable=wrong-import-position
+from simbridge import RequestTemplate, SimulationClient, TemplateError, TransportError
+
 
 def load_config(config_path="mqtt_use.yaml"):
     """Load YAML configuration file.
@@ -31,8 +38,72 @@ def load_config(config_path="mqtt_use.yaml"):
         sys.exit(1)
 
 
+def payload_path(payload_file):
+    """Resolve *payload_file* relative to this client's directory."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), payload_file)
+
+
+def make_sink(config):
+    """Create the optional columnar sink.
+
+    Args:
+        config: Dictionary containing configuration data.
+
+    Returns:
+        ColumnarSink or None: The sink if ``columnar_sink.enabled`` is set.
+    """
+    sink_cfg = config.get('columnar_sink') or {}
+    if not sink_cfg.get('enabled', False):
+        return None
+    from simbridge.columnar import ColumnarSink  # pylint: disable=import-outside-toplevel
+    return ColumnarSink(sink_cfg.get('path', 'results_columns'),
+                        sink_cfg.get('chunk_rows', 65536),
+                        sink_cfg.get('compress', False))
+
+
+def make_bus(config, sink):
+    """Create the event bus that runs the message handlers off paho's thread.
+
+    Args:
+        config: Dictionary containing configuration data.
+        sink: Columnar sink, or None.
+
+    Returns:
+        EventBus: Bus with a ``display`` route, plus a ``sink`` route when
+        *sink* is set, each bounded by ``dispatch.queue_size``.
+    """
+    from simbridge.events import EventBus  # pylint: disable=import-outside-toplevel
+    handlers = {'display': display_message}
+    if sink is not None:
+        handlers['sink'] = functools.partial(sink_message, sink)
+    dispatch_cfg = config.get('dispatch') or {}
+    return EventBus(handlers, int(dispatch_cfg.get('queue_size', 1024)))
+
+
+def display_message(msg):
+    """Print a received MQTT message."""
+    print("\n📥 Message received:")
+    print(f"🔹 Topic: {msg.topic}")
+    print(f"🔹 Payload: {msg.payload.decode()}")
+
+
+def sink_message(sink, msg):
+    """Append the result carried by an MQTT message to *sink*."""
+    try:
+        message = json.loads(msg.payload)
+    except ValueError:
+        return
+    if isinstance(message, dict):
+        sink.append(message)
+
+
 class MQTTClient:
-    """MQTT Client for handling simulation data."""
+    """MQTT Client for handling simulation data.
+
+    Received messages are printed and fed to the columnar sink by the
+    worker threads of an :class:`~simbridge.events.EventBus`, so paho's
+    network thread only enqueues them.
+    """
 
     def __init__(self, config):
         """Initialize the MQTT client.
@@ -42,6 +113,11 @@ class MQTTClient:
         """
         self.config = config['mqtt']
         self.payload_file = config.get('payload_file', 'simulation.yaml')
+        self.sink = make_sink(config)
+        self.bus = make_bus(config, self.sink)
+        self._publishers = [self.bus.publisher('display')]
+        if self.sink is not None:
+            self._publishers.append(self.bus.publisher('sink'))
         self.client = mqtt.Client()
         self.client.username_pw_set(
             self.config['username'],
@@ -56,16 +132,18 @@ class MQTTClient:
         self.client.on_message = self.on_message
 
     def on_message(self, client, userdata, msg):  # pylint: disable=unused-argument
-        """Callback for received messages.
+        """Callback for received messages: queue them for the handlers.
+
+        Blocks while a handler's queue is full, which stops paho from
+        reading further messages until the handler catches up.
 
         Args:
             client: MQTT client instance.
             userdata: User data.
             msg: Message received.
         """
-        print("\n📥 Message received:")
-        print(f"🔹 Topic: {msg.topic}")
-        print(f"🔹 Payload: {msg.payload.decode()}")
+        for publish in self._publishers:
+            publish(msg)
 
     def create_request(self):
         """Load payload from YAML file.
@@ -76,12 +154,8 @@ class MQTTClient:
         Raises:
             SystemExit: If the file cannot be loaded.
         """
-        file_path = os.path.join(
-            os.path.dirname(
-                os.path.abspath(__file__)),
-            self.payload_file)
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
+            with open(payload_path(self.payload_file), 'r', encoding='utf-8') as file:
                 payload = yaml.safe_load(file)
                 print("✅ Payload loaded:", payload)
                 return payload
@@ -114,10 +188,85 @@ class MQTTClient:
         print(
             f"""📡 Listening on {
                 self.config['output_topic']}...\n(CTRL+C to terminate)""")
-        self.client.loop_forever()
+        try:
+            self.client.loop_forever()
+        finally:
+            self.close()
+            for name, stats in self.bus.stats().items():
+                print(f"📊 {name}: delivered {stats['delivered']}, "
+                      f"failed {stats['failed']}, peak queue depth {stats['peak']}")
+
+    def close(self):
+        """Deliver the queued messages, then stop the handlers and the sink."""
+        self.bus.close()
+        if self.sink is not None:
+            self.sink.close()
+
+
+class AsyncMQTTClient(SimulationClient):
+    """asyncio client that keeps one broker connection for many simulations.
+
+    A :class:`~simbridge.SimulationClient` over the SDK's MQTT transport:
+    results on the shared output topic are decoded off paho's network
+    thread and routed, by their ``request_id``, to the matching
+    :class:`~simbridge.ResultStream`.
+    """
+
+    def __init__(self, config, **options):
+        """Initialize the client.
+
+        Args:
+            config: Dictionary containing configuration data.
+            **options: Extra arguments for :class:`~simbridge.SimulationClient`
+                (``window``, ``stream_buffer``, ``overflow``).
+        """
+        super().__init__('mqtt', config, **options)
+
+
+async def run_many(config, count):
+    """Submit *count* copies of the payload file over one connection.
+
+    Each copy gets a unique ``request_id``; the final result of every request
+    is printed as it arrives. The payload is compiled once into a request
+    template, so each copy only costs encoding its ``request_id`` and
+    ``timestamp``. Only final results are read: progress messages are not
+    printed, and neither the event bus nor the columnar sink is used.
+    """
+    payload_file = config.get('payload_file', 'simulation.yaml')
+    try:
+        template = RequestTemplate.from_file(payload_path(payload_file))
+    except (OSError, TemplateError) as exc:
+        print(f"❌ Error loading {payload_file}: {exc}")
+        sys.exit(1)
+    async with AsyncMQTTClient(config, window=max(1, count)) as client:
+        streams = []
+        for _ in range(count):
+            streams.append(await client.submit(template.build(), template))
+        print(f"📤 {count} requests published to {config['mqtt']['input_topic']}")
+        for finished in asyncio.as_completed([s.result() for s in streams]):
+            result = await finished
+            print(f"✅ {result.get('request_id')}: {result.get('status')}")
+
+
+def parse_args():
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-c", "--config", default="mqtt_use.yaml",
+                        help="client configuration file")
+    parser.add_argument("-n", "--requests", type=int,
+                        help="submit N requests concurrently over one connection")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    CONFIG = load_config()
-    MQTT_CLIENT = MQTTClient(CONFIG)
-    MQTT_CLIENT.connect_and_listen()
+    ARGS = parse_args()
+    CONFIG = load_config(ARGS.config)
+    if ARGS.requests:
+        try:
+            asyncio.run(run_many(CONFIG, ARGS.requests))
+        except TransportError as exc:
+            print(f"❌ {exc}")
+            sys.exit(1)
+    else:
+        MQTT_CLIENT = MQTTClient(CONFIG)
+        MQTT_CLIENT.connect_and_listen()
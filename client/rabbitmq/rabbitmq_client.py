@@ -1,13 +1,22 @@
 """RabbitMQ client for simulation bridge."""
+import argparse
+import functools
+import json
 import os
-import ssl
+import queue
 import sys
 import threading
-import uuid
 import time
-import pika
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
 import yaml
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from simbridge.amqp import AdaptivePrefetch, ConnectionManager  # noqa: E402  pylint: disable=wrong-import-position
+from simbridge.codec import CodecError, decode  # noqa: E402  pylint: disable=wrong-import-position
+from simbridge.template import routing_headers  # noqa: E402  pylint: disable=wrong-import-position
+
 
 def load_config(config_path="rabbitmq_use.yaml"):
     """Load YAML configuration file."""
@@ -22,126 +31,281 @@ def load_config(config_path="rabbitmq_use.yaml"):
         sys.exit(1)
 
 
-class RabbitMQClient:
-    """Digital Twin client for simulation bridge."""
-
-    def __init__(self, config):
-        """Initialize the Digital Twin with the given configuration."""
+def make_sink(config):
+    """Return a ColumnarSink when ``columnar_sink.enabled`` is set, else None."""
+    sink_cfg = config.get('columnar_sink') or {}
+    if not sink_cfg.get('enabled', False):
+        return None
+    from simbridge.columnar import ColumnarSink  # pylint: disable=import-outside-toplevel
+    return ColumnarSink(sink_cfg.get('path', 'results_columns'),
+                        sink_cfg.get('chunk_rows', 65536),
+                        sink_cfg.get('compress', False))
+
+
+class PublishError(Exception):
+    """Raised through a publish future when the broker rejects a message."""
+
+
+class RabbitMQClient:  # pylint: disable=too-many-instance-attributes
+    """Digital Twin client for simulation bridge.
+
+    A single connection is driven by pika's asynchronous ``SelectConnection``
+    on a dedicated I/O thread, through :class:`simbridge.amqp.ConnectionManager`.
+    The same connection declares the topology, publishes requests with
+    publisher confirms and consumes results.
+
+    ``send_simulation_request`` may be called from any thread: it only
+    enqueues the message and returns a ``concurrent.futures.Future`` that is
+    resolved when the broker confirms (or rejects) it. The I/O thread
+    publishes queued messages in batches without waiting for each confirm,
+    and the broker acknowledges them cumulatively (``multiple=True``).
+    If the broker drops the connection after setup, the I/O thread
+    reconnects with exponential backoff (``rabbitmq.reconnect``); messages
+    awaiting a confirm at that moment fail with ``PublishError``, and so do
+    the ones still queued when the client stops for good. At most
+    ``publisher.max_outstanding`` messages may be queued or awaiting their
+    confirm; further calls block until confirms free a slot.
+
+    Results are decoded and handed to ``on_result`` by a pool of
+    ``consumer.workers`` threads (0 handles them on the I/O thread). Acks are
+    marshalled back to the I/O thread and sent cumulatively, and the
+    consumer's prefetch follows the observed handler latency. With more than
+    one worker, ``on_result`` runs concurrently and may see the messages of
+    a request out of order.
+    """
+
+    def __init__(self, config, on_result=None, connection_factory=None):
+        """Initialize the Digital Twin with the given configuration.
+
+        Args:
+            config: Client configuration dictionary.
+            on_result: Optional callable receiving ``(source, result)`` for
+                every result; defaults to printing it.
+            connection_factory: ``pika.SelectConnection``-compatible
+                callable; defaults to ``pika.SelectConnection``.
+        """
         self.config = config
         self.dt_id = config['digital_twin']['dt_id']
+        self.on_result = on_result or self.print_result
+        self.sink = make_sink(config)
+        publisher_cfg = config.get('publisher', {})
+        self._outstanding = threading.BoundedSemaphore(
+            int(publisher_cfg.get('max_outstanding', 1024)))
+        self._ready = threading.Event()
+        self._error = None
+
+        # Result handling: worker pool, batched acks, adaptive prefetch
+        consumer_cfg = config.get('consumer', {})
+        self.workers = int(consumer_cfg.get('workers', 1))
+        self.prefetch = AdaptivePrefetch.from_config(consumer_cfg, self.workers)
+        self._executor = None
+        self._sink_lock = threading.Lock()
+        self._acks = queue.SimpleQueue()
+        self._ack_scheduled = threading.Event()
+        self._channel_generation = 0
+        self._ack_floor = 0
+        self._finished = {}
+
+        # Connection, topology and publisher confirms on the I/O thread
+        self.amqp = ConnectionManager(
+            config, self.handle_result, self._on_ready,
+            error_type=PublishError,
+            connection_factory=connection_factory,
+            prefetch=self.prefetch.value,
+            on_channel=self._on_channel_open,
+            on_reconnect=self._on_reconnect)
+
+    @property
+    def result_queue_name(self):
+        """Name of the queue this twin consumes its results from."""
+        return self.amqp.result_queue_name
+
+    # ------------------------------------------------------------------
+    # Lifecycle (caller thread)
+    # ------------------------------------------------------------------
+
+    def start(self, timeout=30):
+        """Open the connection on the I/O thread and wait until it is ready.
+
+        Raises:
+            ConnectionError: If the connection or the topology setup fails.
+        """
+        if self.workers > 0:
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="rabbitmq-worker")
+        self.amqp.start()
+        if not self._ready.wait(timeout):
+            raise ConnectionError("Timed out connecting to RabbitMQ")
+        if self._error is not None:
+            raise ConnectionError(f"RabbitMQ setup failed: {self._error}")
+
+    def stop(self, timeout=10):
+        """Close the connection and wait for the I/O thread to exit."""
+        self.amqp.stop(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.sink is not None:
+            self.sink.close()
+
+    def send_simulation_request(self, payload_data, template=None, timeout=None):
+        """Queue a simulation request for publishing.
+
+        The request is sent as JSON, which the bridge parses like YAML, with
+        its ``request_id``, ``client_id``, ``simulator`` and ``type`` also
+        carried as message headers for routing.
+        Blocks while ``max_outstanding`` messages are unconfirmed, except
+        when called from the I/O thread (e.g. from ``on_result``).
+
+        Args:
+            payload_data: Request dictionary with a ``simulation`` block.
+            template: ``RequestTemplate`` the request was built from; its
+                pre-serialised fields are reused to encode the body.
+            timeout: Seconds to wait for a free slot; ``None`` waits forever.
+
+        Returns:
+            concurrent.futures.Future: Resolved with the message id once the
+            broker confirms the message, or failed with ``PublishError``.
+
+        Raises:
+            PublishError: If no slot frees up within *timeout*.
+        """
+        if template is not None:
+            body = template.encode(payload_data)
+        else:
+            body = json.dumps(payload_data, default=str).encode('utf-8')
+        future = Future()
+        if threading.current_thread() is not self.amqp.thread:
+            if not self._outstanding.acquire(timeout=timeout):
+                raise PublishError(
+                    "Timed out waiting for publisher confirms to free a slot")
+            future.add_done_callback(lambda _future: self._outstanding.release())
+        self.amqp.publish(body, routing_headers(payload_data),
+                          functools.partial(self._settle, future))
+        return future
+
+    # ------------------------------------------------------------------
+    # Connection callbacks (I/O thread)
+    # ------------------------------------------------------------------
 
-        rabbitmq_cfg = config['rabbitmq']
-        credentials = pika.PlainCredentials(
-            username=rabbitmq_cfg['username'],
-            password=rabbitmq_cfg['password']
-        )
-        use_tls = rabbitmq_cfg.get('tls', False)
-
-        if use_tls:
-            context = ssl.create_default_context()
-            context.minimum_version = ssl.TLSVersion.TLSv1_2
-            ssl_options = pika.SSLOptions(context, rabbitmq_cfg['host'])
-            parameters = pika.ConnectionParameters(
-                host=rabbitmq_cfg['host'],
-                port=rabbitmq_cfg.get('port', 5671),
-                virtual_host=rabbitmq_cfg.get('vhost', '/'),
-                credentials=credentials,
-                ssl_options=ssl_options,
-                heartbeat=rabbitmq_cfg.get('heartbeat', 600)
-            )
+    @staticmethod
+    def _settle(future, message_id, error):
+        if error is None:
+            future.set_result(message_id)
         else:
-            parameters = pika.ConnectionParameters(
-                host=rabbitmq_cfg['host'],
-                port=rabbitmq_cfg.get('port', 5672),
-                virtual_host=rabbitmq_cfg.get('vhost', '/'),
-                credentials=credentials,
-                heartbeat=rabbitmq_cfg.get('heartbeat', 600)
-            )
-
-        self.connection = pika.BlockingConnection(parameters)
-        self.channel = self.connection.channel()
-        self.result_queue_name = None
-        self.setup_infrastructure()
-
-    def setup_infrastructure(self):
-        """Set up RabbitMQ exchanges and queues."""
-        input_ex = self.config['exchanges']['input_bridge']
-        result_ex = self.config['exchanges']['bridge_result']
-        queue_cfg = self.config['queue']
-
-        # Declare exchanges
-        self.channel.exchange_declare(
-            exchange=input_ex['name'],
-            exchange_type=input_ex['type'],
-            durable=input_ex['durable']
-        )
-
-        self.channel.exchange_declare(
-            exchange=result_ex['name'],
-            exchange_type=result_ex['type'],
-            durable=result_ex['durable']
-        )
-
-        # Declare and bind result queue
-        self.result_queue_name = (
-            f"{queue_cfg['result_queue_prefix']}."
-            f"{self.dt_id}.result"
-        )
-        self.channel.queue_declare(
-            queue=self.result_queue_name, durable=queue_cfg['durable'])
-        self.channel.queue_bind(
-            exchange=result_ex['name'],
-            queue=self.result_queue_name,
-            routing_key=queue_cfg['routing_key']
-        )
-
-    def send_simulation_request(self, payload_data):
-        """Send a simulation request to the bridge."""
-        payload = {
-            **payload_data
-        }
-
-        payload_yaml = yaml.dump(payload, default_flow_style=False)
-        routing_key = self.config['digital_twin']['routing_key_send']
-
-        self.channel.basic_publish(
-            exchange=self.config['exchanges']['input_bridge']['name'],
-            routing_key=routing_key,
-            body=payload_yaml,
-            properties=pika.BasicProperties(
-                delivery_mode=2,
-                content_type='application/x-yaml',
-                message_id=str(uuid.uuid4())
-            )
-        )
+            future.set_exception(error)
 
-    def handle_result(self, channel, method, properties, body):  # pylint: disable=unused-argument
-        """Handle incoming simulation results."""
-        try:
-            source = method.routing_key.split('.')[0]
-            result = yaml.safe_load(body)
+    def _on_ready(self, error):
+        self._error = error
+        self._ready.set()
+
+    def _on_channel_open(self, channel):  # pylint: disable=unused-argument
+        # Delivery tags restart on a new channel; drop acks for the old one
+        self._channel_generation += 1
+        self._ack_floor = 0
+        self._finished.clear()
+
+    @staticmethod
+    def _on_reconnect(delay):
+        print(f"RabbitMQ connection lost, reconnecting in {delay:.1f}s...")
 
-            print(f"\n[{self.dt_id.upper()}] Received result from {source}:")
-            print(f"Result: {result}")
-            print("-" * 50)
+    # ------------------------------------------------------------------
+    # Results (I/O thread)
+    # ------------------------------------------------------------------
 
+    def handle_result(self, channel, method, properties, body):  # pylint: disable=unused-argument
+        """Handle incoming simulation results.
+
+        Hands the message to the worker pool, or processes and acks it on
+        the I/O thread when there are no workers. Failed messages are nacked
+        without requeueing.
+        """
+        if self._executor is not None:
+            self._executor.submit(self._process_result, self._channel_generation,
+                                  method.delivery_tag, method.routing_key,
+                                  properties.content_type, body)
+            return
+        start = time.perf_counter()
+        if self._decode_and_dispatch(method.routing_key, properties.content_type, body):
             channel.basic_ack(method.delivery_tag)
+        else:
+            channel.basic_nack(method.delivery_tag, requeue=False)
+        self.prefetch.observe(time.perf_counter() - start)
+        self._adapt_prefetch()
+
+    def _decode_and_dispatch(self, routing_key, content_type, body):
+        """Decode one result and pass it to the sink and ``on_result``.
 
-        except yaml.YAMLError as err:
-            print(f"Error decoding YAML result: {err}")
-            channel.basic_nack(method.delivery_tag)
+        The body is decoded with the codec of its ``content_type`` (JSON,
+        msgpack or YAML), or sniffed when the sender did not set one.
+
+        Returns:
+            bool: Whether the message was handled and may be acked.
+        """
+        try:
+            source = routing_key.split('.')[0]
+            result = decode(body, content_type)
+            if self.sink is not None and isinstance(result, dict):
+                with self._sink_lock:
+                    self.sink.append(result)
+            self.on_result(source, result)
+            return True
+        except CodecError as err:
+            print(f"Error decoding result: {err}")
         except Exception as err:  # pylint: disable=broad-exception-caught
             print(f"Error processing the result: {err}")
-            channel.basic_nack(method.delivery_tag)
-
-    def start_listening(self):
-        """Start listening for simulation results."""
-        self.channel.basic_consume(
-            queue=self.result_queue_name,
-            on_message_callback=self.handle_result
-        )
-        print(f" [{self.dt_id.upper()}] Listening for simulation results...")
-        self.channel.start_consuming()
+        return False
+
+    def _process_result(self, generation, delivery_tag, routing_key, content_type, body):  # pylint: disable=too-many-arguments
+        """Worker thread: handle one result and queue its ack."""
+        start = time.perf_counter()
+        handled = self._decode_and_dispatch(routing_key, content_type, body)
+        self.prefetch.observe(time.perf_counter() - start)
+        self._acks.put((generation, delivery_tag, handled))
+        if not self._ack_scheduled.is_set():
+            self._ack_scheduled.set()
+            self.amqp.call_soon(self._flush_acks)
+
+    def _flush_acks(self):
+        """Send the acks queued by the workers (I/O thread).
+
+        Workers finish out of order, so only the contiguous run of handled
+        delivery tags is acknowledged, with one cumulative ``multiple=True``
+        ack; failed messages are nacked individually and not requeued, so a
+        result that cannot be handled is not redelivered forever.
+        """
+        self._ack_scheduled.clear()
+        channel = self.amqp.channel
+        if channel is None or not channel.is_open:
+            return
+        while True:
+            try:
+                generation, delivery_tag, handled = self._acks.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._channel_generation:
+                continue
+            if not handled:
+                channel.basic_nack(delivery_tag, requeue=False)
+            self._finished[delivery_tag] = handled
+        last_handled = 0
+        while self._ack_floor + 1 in self._finished:
+            self._ack_floor += 1
+            if self._finished.pop(self._ack_floor):
+                last_handled = self._ack_floor
+        if last_handled:
+            channel.basic_ack(last_handled, multiple=True)
+        self._adapt_prefetch()
+
+    def _adapt_prefetch(self):
+        prefetch = self.prefetch.update()
+        if prefetch is not None:
+            self.amqp.set_prefetch(prefetch)
+
+    def print_result(self, source, result):
+        """Default result handler: print the result."""
+        print(f"\n[{self.dt_id.upper()}] Received result from {source}:")
+        print(f"Result: {result}")
+        print("-" * 50)
 
     @staticmethod
     def load_yaml_file(file_path):
@@ -150,31 +314,70 @@ class RabbitMQClient:
             return yaml.safe_load(file)
 
 
-def start_dt_listener(config):
-    """Start a Digital Twin listener in a separate thread."""
-    dt = RabbitMQClient(config)
-    dt.start_listening()
+def submit_many(dt, payload, count):
+    """Pipeline *count* copies of *payload* and wait for all confirms.
+
+    The payload is compiled once into a request template, so each copy only
+    costs encoding its ``request_id`` and ``timestamp``.
+    """
+    from simbridge.template import RequestTemplate  # pylint: disable=import-outside-toplevel
+    template = RequestTemplate(payload)
+    start = time.perf_counter()
+    futures = []
+    for _ in range(count):
+        futures.append(dt.send_simulation_request(template.build(), template))
+    failed = 0
+    for future in futures:
+        try:
+            future.result()
+        except PublishError as err:
+            failed += 1
+            print(f"Publish failed: {err}")
+    elapsed = time.perf_counter() - start
+    print(f"{count - failed}/{count} requests confirmed in {elapsed:.3f}s "
+          f"({count / elapsed:.1f} msg/s)")
+
+
+def parse_args():
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-c", "--config", default="rabbitmq_use.yaml",
+                        help="client configuration file")
+    parser.add_argument("-n", "--requests", type=int, default=1,
+                        help="number of requests to pipeline")
+    parser.add_argument("--standin", nargs="?", const="../standin/standin_use.yaml",
+                        metavar="CONFIG",
+                        help="use the in-process stand-in bridge instead of a broker")
+    return parser.parse_args()
+
+
+def standin_factory(config_path):
+    """Return a fake connection factory using the stand-in's result profile."""
+    from simbridge.standin import ResultProfile  # pylint: disable=import-outside-toplevel
+    from simbridge.standin.amqp import connection_factory  # pylint: disable=import-outside-toplevel
+    profile = ResultProfile.from_config(load_config(config_path).get('results') or {})
+    return connection_factory(profile)
 
 
 def main():
     """Main program entry point."""
-    config = load_config()
+    args = parse_args()
+    config = load_config(args.config)
 
-    # Start listener thread
-    listener_thread = threading.Thread(
-        target=start_dt_listener, args=(config,))
-    listener_thread.daemon = True
-    listener_thread.start()
-
-    # Create digital twin and send simulation request
-    dt = RabbitMQClient(config)
+    factory = standin_factory(args.standin) if args.standin else None
+    dt = RabbitMQClient(config, connection_factory=factory)
+    dt.start()
+    print(f" [{dt.dt_id.upper()}] Listening for simulation results...")
 
     base_dir = os.path.dirname(os.path.abspath(__file__))
     yaml_file_path = os.path.join(base_dir, config['payload_file'])
 
     try:
         simulation_payload = dt.load_yaml_file(yaml_file_path)
-        dt.send_simulation_request(simulation_payload)
+        if args.requests > 1:
+            submit_many(dt, simulation_payload, args.requests)
+        else:
+            dt.send_simulation_request(simulation_payload).result()
 
         print("\nPress Ctrl+C to terminate the program...")
         while True:
@@ -184,6 +387,8 @@ def main():
         print("\nProgram terminated by the user.")
     except Exception as err:  # pylint: disable=broad-exception-caught
         print(f"Error: {err}")
+    finally:
+        dt.stop()
 
 
 if __name__ == "__main__":
@@ -5,15 +5,22 @@ This version supports only HS256 JWT signing.
 
 from __future__ import annotations
 
+import argparse
 import asyncio
+import json
+import math
 import sys
 import time
+import uuid
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, NoReturn
+from typing import Any, AsyncIterator, Dict, List, NoReturn, Optional
 import httpx
-import jwt
 import yaml
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from simbridge.transports.rest import build_token  # pylint: disable=wrong-import-position
+
 
 def load_config(path: str = "rest_use.yaml") -> Dict[str, Any]:
     """Load YAML configuration and return a dict; terminate on error."""
@@ -28,37 +35,36 @@ def load_config(path: str = "rest_use.yaml") -> Dict[str, Any]:
         sys.exit(1)
 
 
-def build_token(cfg: Dict[str, Any]) -> str:
-    """Return an HS256‑signed JWT using *cfg* values."""
-
-    # Get the JWT secret from environment or fallback to config
-    secret = cfg.get("secret", "")
-    if len(secret) < 32:
-        print("HS256 requires JWT secret ≥ 32 characters (256 bits).")
-        sys.exit(1)
+def percentile(values: List[float], pct: float) -> float:
+    """Return the *pct* percentile of *values* (nearest-rank method)."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
 
-    now = int(time.time())
 
-    payload = {
-        # "sub" (Subject): Identifies the principal (e.g., user or service)
-        # that is the subject of the JWT. Must be unique within the issuer's
-        # context.
-        "sub": cfg.get("subject", "client-123"),
+@dataclass
+class StreamTiming:
+    """Timings (seconds, relative to request start) of one simulation stream."""
 
-        # "iss" (Issuer): Identifies the principal that issued the JWT.
-        # Used to verify the origin of the token.
-        "iss": cfg.get("issuer", "simulation-bridge"),
+    request_id: str
+    ttfb: Optional[float] = None
+    completed: Optional[float] = None
+    total: Optional[float] = None
+    status: str = "pending"
+    error: Optional[str] = None
 
-        # "iat" (Issued At): The timestamp when the JWT was issued.
-        "iat": now,
-
-        # "exp" (Expiration Time): The timestamp after which the token must not be accepted.
-        # This defines how long the token is valid (default is 15 minutes).
-        "exp": now + int(cfg.get("ttl", 900)),
-    }
 
-    # Encode and sign the JWT using HS256 algorithm
-    return jwt.encode(payload, secret, algorithm="HS256")
+def make_sink(cfg: Dict[str, Any]):
+    """Return a ColumnarSink when ``columnar_sink.enabled`` is set, else None."""
+    sink_cfg = cfg.get("columnar_sink") or {}
+    if not sink_cfg.get("enabled", False):
+        return None
+    from simbridge.columnar import ColumnarSink  # pylint: disable=import-outside-toplevel
+    return ColumnarSink(sink_cfg.get("path", "results_columns"),
+                        sink_cfg.get("chunk_rows", 65536),
+                        sink_cfg.get("compress", False))
 
 
 class RESTClient:
@@ -69,21 +75,33 @@ class RESTClient:
         self.yaml_file = cfg["yaml_file"]
         self.timeout = int(cfg.get("timeout", 600))
         self.ssl_verify = cfg.get("ssl_verify", False)
-        self.token = build_token(cfg)
+        try:
+            self.token = build_token(cfg)
+        except ValueError as exc:
+            print(exc)
+            sys.exit(1)
+        self.load_cfg = cfg.get("load", {}) or {}
+        self.unique_client_ids = cfg.get("unique_client_ids", True)
+        self.sink = make_sink(cfg)
 
-    async def run(self) -> None:
-        headers = {
-            "Content-Type": "application/x-yaml",
+    def _headers(self, content_type: str = "application/x-yaml") -> Dict[str, str]:
+        return {
+            "Content-Type": content_type,
             "Accept": "application/x-ndjson",
             "Authorization": f"Bearer {self.token}",
         }
 
+    def _read_payload(self) -> bytes:
         try:
-            payload = Path(self.yaml_file).read_bytes()
+            return Path(self.yaml_file).read_bytes()
         except FileNotFoundError:
             print(f"YAML file not found: {self.yaml_file}")
             sys.exit(1)
 
+    async def run(self) -> None:
+        headers = self._headers()
+        payload = self._read_payload()
+
         async with httpx.AsyncClient(timeout=self.timeout, verify=self.ssl_verify) as client:
             try:
                 async with client.stream("POST", self.url, headers=headers,
@@ -95,13 +113,179 @@ class RESTClient:
                     async for line in resp.aiter_lines():
                         if line.strip():
                             print(line)
+                            if self.sink is not None:
+                                self._sink_line(line)
             except httpx.RequestError as exc:
                 print(f"Network error contacting {self.url}: {exc}")
+            finally:
+                if self.sink is not None:
+                    self.sink.close()
+
+    def _sink_line(self, line: str) -> None:
+        try:
+            item = json.loads(line)
+        except ValueError:
+            return
+        if isinstance(item, dict):
+            self.sink.append(item)
+
+    async def stream_results(self, client: httpx.AsyncClient, message: Dict[str, Any],
+                             body: Optional[bytes] = None) -> AsyncIterator[Dict[str, Any]]:
+        """POST *message* as JSON and yield each NDJSON line as a dict.
+
+        *body* is *message* already encoded, e.g. by a ``RequestTemplate``.
+
+        Raises:
+            httpx.HTTPStatusError: If the bridge rejects the request.
+        """
+        if body is None:
+            body = json.dumps(message, default=str).encode("utf-8")
+        async with client.stream("POST", self.url,
+                                 headers=self._headers("application/json"),
+                                 content=body) as resp:
+            if resp.status_code >= 400:
+                await resp.aread()
+                resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(item, dict):
+                    yield item
+
+    async def _timed_stream(self, client: httpx.AsyncClient, message: Dict[str, Any],
+                            body: Optional[bytes] = None) -> StreamTiming:
+        """POST *message* and time its NDJSON stream until the server closes it."""
+        timing = StreamTiming(request_id=message["simulation"]["request_id"])
+        start = time.perf_counter()
+        try:
+            async for item in self.stream_results(client, message, body):
+                elapsed = time.perf_counter() - start
+                if timing.ttfb is None:
+                    timing.ttfb = elapsed
+                status = item.get("status", "")
+                if status == "completed":
+                    timing.completed = elapsed
+                    timing.status = "completed"
+                elif status in ("error", "timeout"):
+                    timing.status = status
+            if timing.status == "pending":
+                timing.status = "closed"
+        except httpx.HTTPStatusError as exc:
+            timing.status = "http_error"
+            timing.error = f"{exc.response.status_code} {exc.response.reason_phrase}"
+        except httpx.HTTPError as exc:
+            timing.status = "network_error"
+            timing.error = str(exc)
+        timing.total = time.perf_counter() - start
+        return timing
+
+    async def run_load(self, requests: int, concurrency: int) -> List[StreamTiming]:
+        """Open *requests* simulation streams, at most *concurrency* at a time.
+
+        All streams share one pooled ``httpx.AsyncClient`` so they are
+        multiplexed over a single HTTP/2 connection (one TLS handshake)
+        whenever the server negotiates h2. The payload is compiled once into
+        a request template, so each request only costs encoding its
+        ``request_id``, ``client_id`` and ``timestamp``. Unless
+        ``unique_client_ids`` is disabled, every stream gets its own
+        ``client_id``.
+        """
+        from simbridge.template import RequestTemplate, TemplateError  # pylint: disable=import-outside-toplevel
+        try:
+            template = RequestTemplate(yaml.safe_load(self._read_payload()))
+        except yaml.YAMLError as exc:
+            print(f"YAML parse error in {self.yaml_file}: {exc}")
+            sys.exit(1)
+        except TemplateError as exc:
+            print(f"Invalid request in {self.yaml_file}: {exc}")
+            sys.exit(1)
+
+        client_id = template.simulation.get("client_id", "client")
+        run_id = uuid.uuid4().hex[:8]
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency,
+                              max_keepalive_connections=concurrency)
+
+        async def one(index: int, client: httpx.AsyncClient) -> StreamTiming:
+            request_id = f"{run_id}-{index:06d}"
+            if self.unique_client_ids:
+                message = template.build(request_id, client_id=f"{client_id}-{request_id}")
+            else:
+                message = template.build(request_id)
+            async with semaphore:
+                return await self._timed_stream(client, message,
+                                                template.encode(message))
+
+        async with httpx.AsyncClient(http2=True, timeout=self.timeout,
+                                     verify=self.ssl_verify,
+                                     limits=limits) as client:
+            started = time.perf_counter()
+            timings = await asyncio.gather(
+                *(one(i, client) for i in range(requests)))
+            wall = time.perf_counter() - started
+
+        print_load_report(timings, wall, concurrency)
+        return timings
+
+
+def print_load_report(timings: List[StreamTiming], wall: float,
+                      concurrency: int) -> None:
+    """Print throughput and TTFB / completion / total latency percentiles."""
+    completed = [t for t in timings if t.status == "completed"]
+    failed = [t for t in timings if t.status != "completed"]
+    print(f"Requests: {len(timings)}  concurrency: {concurrency}  "
+          f"wall: {wall:.3f}s  throughput: {len(timings) / wall:.2f} req/s")
+    print(f"Completed: {len(completed)}  failed: {len(failed)}")
+
+    series = {
+        "ttfb": [t.ttfb for t in timings if t.ttfb is not None],
+        "completed": [t.completed for t in completed],
+        "latency": [t.total for t in timings if t.total is not None],
+    }
+    print(f"{'metric':<10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, values in series.items():
+        if not values:
+            continue
+        row = [percentile(values, p) * 1000 for p in (50, 95, 99, 100)]
+        print(f"{name:<10} " + " ".join(f"{v:>10.1f}" for v in row))
+
+    errors: Dict[str, int] = {}
+    for timing in failed:
+        key = f"{timing.status}: {timing.error}" if timing.error else timing.status
+        errors[key] = errors.get(key, 0) + 1
+    for key, count in errors.items():
+        print(f"  {count} × {key}")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-c", "--config", default="rest_use.yaml",
+                        help="client configuration file")
+    parser.add_argument("--load", action="store_true",
+                        help="run the concurrent load-generation mode")
+    parser.add_argument("-n", "--requests", type=int,
+                        help="number of simulations to submit in load mode")
+    parser.add_argument("--concurrency", type=int,
+                        help="maximum number of concurrent streams in load mode")
+    return parser.parse_args()
 
 
 def main() -> NoReturn:  # pragma: no cover
-    cfg = load_config()
-    asyncio.run(RESTClient(cfg).run())
+    args = parse_args()
+    cfg = load_config(args.config)
+    client = RESTClient(cfg)
+    if args.load:
+        requests = args.requests or int(client.load_cfg.get("requests", 100))
+        concurrency = args.concurrency or int(
+            client.load_cfg.get("concurrency", 10))
+        asyncio.run(client.run_load(requests, max(1, concurrency)))
+    else:
+        asyncio.run(client.run())
 
 
 if __name__ == "__main__":
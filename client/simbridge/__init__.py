@@ -0,0 +1,21 @@
+"""Shared building blocks for the simulation bridge example clients."""
+
+from .client import SimulationClient, load_config
+from .events import EventBus
+from .hedging import HedgedClient
+from .streams import TERMINAL_STATUSES, ResultStream
+from .template import RequestTemplate, TemplateError
+from .transports import Transport, TransportError
+
+__all__ = [
+    "EventBus",
+    "HedgedClient",
+    "SimulationClient",
+    "RequestTemplate",
+    "ResultStream",
+    "TERMINAL_STATUSES",
+    "TemplateError",
+    "Transport",
+    "TransportError",
+    "load_config",
+]
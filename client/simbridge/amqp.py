@@ -0,0 +1,442 @@
+"""Shared AMQP connection management for the RabbitMQ clients.
+
+``rabbitmq_client.py`` and the SDK's RabbitMQ transport both run their
+connection through :class:`ConnectionManager`: one pika connection on a
+dedicated I/O thread that declares the topology, publishes with batched
+publisher confirms, consumes the result queue and reconnects after the
+broker drops it. Connections are built from the ``rabbitmq`` section of
+``rabbitmq_use.yaml`` through :func:`connection_parameters`, so credentials,
+TLS, heartbeats and frame sizes are tuned in one place. :class:`Reconnect`
+paces reconnection attempts, and :class:`AdaptivePrefetch` sizes consumer
+prefetch.
+"""
+
+from __future__ import annotations
+
+import collections
+import functools
+import math
+import queue
+import random
+import ssl
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import pika
+
+
+def connection_parameters(rabbitmq_cfg: Dict[str, Any]) -> pika.ConnectionParameters:
+    """Build pika connection parameters from the ``rabbitmq`` section.
+
+    Optional keys: ``tls``, ``port``, ``vhost``, ``heartbeat`` (seconds),
+    ``frame_max`` (bytes) and ``blocked_connection_timeout`` (seconds a
+    connection may stay blocked by broker flow control before it is closed).
+    """
+    credentials = pika.PlainCredentials(username=rabbitmq_cfg["username"],
+                                        password=rabbitmq_cfg["password"])
+    options: Dict[str, Any] = {}
+    if rabbitmq_cfg.get("tls", False):
+        context = ssl.create_default_context()
+        context.minimum_version = ssl.TLSVersion.TLSv1_2
+        options["ssl_options"] = pika.SSLOptions(context, rabbitmq_cfg["host"])
+    if rabbitmq_cfg.get("frame_max") is not None:
+        options["frame_max"] = int(rabbitmq_cfg["frame_max"])
+    if rabbitmq_cfg.get("blocked_connection_timeout") is not None:
+        options["blocked_connection_timeout"] = float(
+            rabbitmq_cfg["blocked_connection_timeout"])
+    return pika.ConnectionParameters(
+        host=rabbitmq_cfg["host"],
+        port=rabbitmq_cfg.get("port", 5671 if "ssl_options" in options else 5672),
+        virtual_host=rabbitmq_cfg.get("vhost", "/"),
+        credentials=credentials,
+        heartbeat=rabbitmq_cfg.get("heartbeat", 600),
+        **options)
+
+
+class Reconnect:
+    """Exponential backoff with jitter between reconnection attempts.
+
+    Args:
+        enabled: Whether dropped connections are re-established at all.
+        initial_delay: Seconds before the first attempt.
+        max_delay: Upper bound of the delay between attempts.
+    """
+
+    def __init__(self, enabled: bool = True, initial_delay: float = 1.0,
+                 max_delay: float = 30.0):
+        self.enabled = enabled
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.attempts = 0
+
+    @classmethod
+    def from_config(cls, rabbitmq_cfg: Dict[str, Any]) -> "Reconnect":
+        """Build the policy from the ``reconnect`` key of the ``rabbitmq`` section."""
+        cfg = rabbitmq_cfg.get("reconnect") or {}
+        return cls(enabled=cfg.get("enabled", True),
+                   initial_delay=float(cfg.get("initial_delay", 1.0)),
+                   max_delay=float(cfg.get("max_delay", 30.0)))
+
+    def next_delay(self) -> float:
+        """Return the delay before the next attempt and count it."""
+        delay = min(self.max_delay, self.initial_delay * 2 ** min(self.attempts, 16))
+        self.attempts += 1
+        return delay * random.uniform(0.5, 1.0)
+
+    def reset(self) -> None:
+        """Start over after a connection was established."""
+        self.attempts = 0
+
+
+class AdaptivePrefetch:
+    """Size a consumer's prefetch to the observed handler latency.
+
+    The prefetch count is kept at about ``buffer_seconds`` worth of work for
+    the consumer's workers (Little's law): slow handlers get a small buffer
+    so unacknowledged messages do not pile up in memory, fast ones a large
+    buffer so the workers never starve. Latencies are reported from worker
+    threads with :meth:`observe`; the I/O thread polls :meth:`update`.
+
+    Args:
+        workers: Number of handlers running concurrently.
+        initial: Prefetch count before any latency is known.
+        minimum: Lower bound of the prefetch count.
+        maximum: Upper bound of the prefetch count.
+        buffer_seconds: Handler time the prefetched messages should cover.
+    """
+
+    def __init__(self, workers: int = 1, initial: int = 256, minimum: int = 16,
+                 maximum: int = 2048, buffer_seconds: float = 0.5):
+        self.workers = max(1, workers)
+        self.value = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.buffer_seconds = buffer_seconds
+        self.latency: Optional[float] = None
+        self._lock = threading.Lock()
+        self._last_update = time.monotonic()
+
+    @classmethod
+    def from_config(cls, consumer_cfg: Dict[str, Any], workers: int) -> "AdaptivePrefetch":
+        """Build the policy from the ``consumer`` configuration section."""
+        return cls(workers=workers,
+                   initial=int(consumer_cfg.get("prefetch", 256)),
+                   minimum=int(consumer_cfg.get("min_prefetch", 16)),
+                   maximum=int(consumer_cfg.get("max_prefetch", 2048)),
+                   buffer_seconds=float(consumer_cfg.get("buffer_seconds", 0.5)))
+
+    def observe(self, seconds: float) -> None:
+        """Record the latency of one handled message."""
+        with self._lock:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += 0.2 * (seconds - self.latency)
+
+    def update(self) -> Optional[int]:
+        """Return the new prefetch count if it should change, else ``None``.
+
+        The count changes at most once per second, and only by more than a
+        quarter, to avoid a ``basic_qos`` round trip for every message.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.latency is None or now - self._last_update < 1.0:
+                return None
+            self._last_update = now
+            wanted = self.workers * self.buffer_seconds / max(self.latency, 1e-6)
+        target = int(min(self.maximum, max(self.minimum, math.ceil(wanted))))
+        if abs(target - self.value) <= self.value // 4:
+            return None
+        self.value = target
+        return target
+
+
+# Called with the message id and ``None``, or the error, once a publish settles
+PublishCallback = Callable[[str, Optional[BaseException]], None]
+
+
+class ConnectionManager:  # pylint: disable=too-many-instance-attributes
+    """One RabbitMQ connection driven on a dedicated I/O thread.
+
+    Each (re)opened channel declares the input and result exchanges and the
+    result queue, enables publisher confirms, sets the prefetch count and
+    consumes the result queue with *on_message*. :meth:`publish` may be
+    called from any thread: requests are queued and published by the I/O
+    thread, at most ``publisher.batch_size`` per loop turn, without waiting
+    for each confirm; the broker acknowledges them cumulatively.
+
+    A connection lost after setup is re-established with :class:`Reconnect`
+    backoff. Publishes awaiting a confirm at that moment fail, queued ones
+    wait for the new channel. Once the I/O thread exits (after :meth:`stop`,
+    a failed setup or a loss without reconnection) every publish still
+    queued or unconfirmed fails, and later ones fail at once.
+
+    Args:
+        config: Contents of ``rabbitmq_use.yaml``.
+        on_message: pika consumer callback for results (I/O thread).
+        on_ready: Called on the I/O thread, once, with ``None`` when the
+            first setup completes or with the error that made it fail.
+        error_type: Exception type publish failures are reported with.
+        connection_factory: ``pika.SelectConnection``-compatible callable.
+        prefetch: Initial prefetch count of the result consumer.
+        on_channel: Called with each new channel before its setup.
+        on_reconnect: Called with the delay before each reconnection.
+    """
+
+    def __init__(self, config: Dict[str, Any],  # pylint: disable=too-many-arguments
+                 on_message: Callable[..., None],
+                 on_ready: Callable[[Optional[BaseException]], None],
+                 error_type: Callable[[str], BaseException] = ConnectionError,
+                 connection_factory: Optional[Callable[..., Any]] = None,
+                 prefetch: int = 256,
+                 on_channel: Optional[Callable[[Any], None]] = None,
+                 on_reconnect: Optional[Callable[[float], None]] = None):
+        self.config = config
+        self.on_message = on_message
+        self.on_ready = on_ready
+        self.error_type = error_type
+        self.connection_factory = connection_factory or pika.SelectConnection
+        self.prefetch = prefetch
+        self.on_channel = on_channel
+        self.on_reconnect = on_reconnect
+        self.batch_size = int((config.get("publisher") or {}).get("batch_size", 256))
+        queue_cfg = config["queue"]
+        self.result_queue_name = (f"{queue_cfg['result_queue_prefix']}."
+                                  f"{config['digital_twin']['dt_id']}.result")
+        self.reconnect = Reconnect.from_config(config["rabbitmq"])
+        self.connection = None
+        self.channel = None
+        self.thread: Optional[threading.Thread] = None
+        self._closing = False
+        self._established = False
+        self._reported = False
+        self._exited = False
+        self._stop_requested = threading.Event()
+        self._outbox: "queue.SimpleQueue[Tuple[bytes, Dict[str, Any], str, PublishCallback]]" = \
+            queue.SimpleQueue()
+        self._drain_scheduled = threading.Event()
+        self._delivery_tag = 0
+        self._unconfirmed: "collections.OrderedDict[int, Tuple[str, PublishCallback]]" = \
+            collections.OrderedDict()
+        self._returned: Set[str] = set()
+
+    # -- caller side ------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the I/O thread; *on_ready* reports the outcome."""
+        self.thread = threading.Thread(target=self._run, name="rabbitmq-io", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Close the connection and wait up to *timeout* for the I/O thread."""
+        if not self._closing:
+            self._closing = True
+            self._stop_requested.set()
+            if self.connection is not None:
+                self.connection.ioloop.add_callback_threadsafe(self._close)
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def call_soon(self, callback: Callable[[], None]) -> None:
+        """Run *callback* on the I/O thread."""
+        self.connection.ioloop.add_callback_threadsafe(callback)
+
+    def publish(self, body: bytes, headers: Dict[str, Any], done: PublishCallback) -> str:
+        """Queue *body* for publishing and return its message id.
+
+        *done* is called with the message id and ``None`` once the broker
+        confirms the message, or with the error that made it fail.
+        """
+        message_id = str(uuid.uuid4())
+        self._outbox.put((body, headers, message_id, done))
+        if self._exited:
+            self._fail_outbox(self.error_type("RabbitMQ connection is closed"))
+        elif not self._drain_scheduled.is_set():
+            self._drain_scheduled.set()
+            self.call_soon(self._drain_outbox)
+        return message_id
+
+    # -- I/O thread -------------------------------------------------------
+
+    def _run(self) -> None:
+        """Run connections until stopped, reconnecting after a lost one."""
+        try:
+            while True:
+                self.connection = self.connection_factory(
+                    parameters=connection_parameters(self.config["rabbitmq"]),
+                    on_open_callback=self._on_connection_open,
+                    on_open_error_callback=self._on_open_error,
+                    on_close_callback=self._on_connection_closed)
+                self.connection.ioloop.start()
+                # Initial failures are reported by on_ready; only retry later losses.
+                if self._closing or not self._established or not self.reconnect.enabled:
+                    return
+                delay = self.reconnect.next_delay()
+                if self.on_reconnect is not None:
+                    self.on_reconnect(delay)
+                if self._stop_requested.wait(delay):
+                    return
+        finally:
+            self._exited = True
+            self.channel = None
+            error = self.error_type("RabbitMQ connection closed")
+            self._fail_unconfirmed(error)
+            self._fail_outbox(error)
+            self._report(error)
+
+    def _report(self, error: Optional[BaseException]) -> None:
+        if not self._reported:
+            self._reported = True
+            self.on_ready(error)
+
+    def _on_connection_open(self, connection) -> None:
+        if self._closing:
+            connection.close()
+            return
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_open_error(self, connection, err) -> None:  # pylint: disable=unused-argument
+        self._report(self.error_type(f"RabbitMQ connection failed: {err!r}"))
+        self.connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason) -> None:  # pylint: disable=unused-argument
+        self.channel = None
+        error = self.error_type(f"RabbitMQ connection closed: {reason}")
+        self._fail_unconfirmed(error)
+        self._report(error)
+        self.connection.ioloop.stop()
+
+    def _on_channel_open(self, channel) -> None:
+        self.channel = channel
+        self._delivery_tag = 0
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.add_on_return_callback(self._on_return)
+        if self.on_channel is not None:
+            self.on_channel(channel)
+        input_ex = self.config["exchanges"]["input_bridge"]
+        result_ex = self.config["exchanges"]["bridge_result"]
+        queue_cfg = self.config["queue"]
+        steps = [
+            functools.partial(channel.exchange_declare, exchange=input_ex["name"],
+                              exchange_type=input_ex["type"], durable=input_ex["durable"]),
+            functools.partial(channel.exchange_declare, exchange=result_ex["name"],
+                              exchange_type=result_ex["type"], durable=result_ex["durable"]),
+            functools.partial(channel.queue_declare, queue=self.result_queue_name,
+                              durable=queue_cfg["durable"]),
+            functools.partial(channel.queue_bind, queue=self.result_queue_name,
+                              exchange=result_ex["name"],
+                              routing_key=queue_cfg["routing_key"]),
+            functools.partial(channel.confirm_delivery,
+                              ack_nack_callback=self._on_delivery_confirmation),
+            functools.partial(channel.basic_qos, prefetch_count=self.prefetch,
+                              global_qos=True),
+        ]
+
+        # Each step runs when the broker acknowledges the previous one
+        def run_step(_frame=None):
+            if steps:
+                steps.pop(0)(callback=run_step)
+                return
+            channel.basic_consume(queue=self.result_queue_name,
+                                  on_message_callback=self.on_message)
+            self.reconnect.reset()
+            self._established = True
+            self._report(None)
+            # Requests queued while (re)connecting
+            self._drain_scheduled.clear()
+            self._drain_outbox()
+
+        run_step()
+
+    def _on_channel_closed(self, channel, reason) -> None:  # pylint: disable=unused-argument
+        self._fail_unconfirmed(self.error_type(f"RabbitMQ channel closed: {reason}"))
+        if not self.connection.is_closing and not self.connection.is_closed:
+            self.connection.close()
+
+    def _close(self) -> None:
+        if self.channel is not None and self.channel.is_open:
+            self.channel.close()
+        elif not self.connection.is_closing and not self.connection.is_closed:
+            self.connection.close()
+
+    def set_prefetch(self, count: int) -> None:
+        """Change the prefetch count of the result consumer (I/O thread).
+
+        The limit is set per channel (``global_qos``): RabbitMQ applies a
+        per-consumer limit only to consumers created afterwards, so it would
+        not reach the running consumer. The channel has no other consumer.
+        """
+        self.prefetch = count
+        if self.channel is not None and self.channel.is_open:
+            self.channel.basic_qos(prefetch_count=count, global_qos=True)
+
+    def _drain_outbox(self) -> None:
+        """Publish up to ``batch_size`` queued requests without waiting."""
+        self._drain_scheduled.clear()
+        if self.channel is None and self.reconnect.enabled and not self._closing:
+            return  # kept queued; drained again once reconnected
+        exchange = self.config["exchanges"]["input_bridge"]["name"]
+        routing_key = self.config["digital_twin"]["routing_key_send"]
+        for _ in range(self.batch_size):
+            try:
+                body, headers, message_id, done = self._outbox.get_nowait()
+            except queue.Empty:
+                return
+            if self.channel is None or not self.channel.is_open:
+                done(message_id, self.error_type("Channel is not open"))
+                continue
+            self.channel.basic_publish(
+                exchange=exchange, routing_key=routing_key, body=body,
+                properties=pika.BasicProperties(delivery_mode=2,
+                                                content_type="application/json",
+                                                message_id=message_id,
+                                                headers=headers),
+                mandatory=True)
+            self._delivery_tag += 1
+            self._unconfirmed[self._delivery_tag] = (message_id, done)
+        # More work left: yield to the I/O loop (confirms, results) first
+        if not self._drain_scheduled.is_set():
+            self._drain_scheduled.set()
+            self.call_soon(self._drain_outbox)
+
+    def _on_return(self, channel, method, properties, body) -> None:  # pylint: disable=unused-argument
+        """Remember unroutable messages; their ack follows the return."""
+        self._returned.add(properties.message_id)
+
+    def _on_delivery_confirmation(self, frame) -> None:
+        """Settle the publishes covered by a (possibly cumulative) ack/nack."""
+        method = frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            tags = [tag for tag in self._unconfirmed if tag <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag]
+        for tag in tags:
+            message_id, done = self._unconfirmed.pop(tag, (None, None))
+            if done is None:
+                continue
+            if not acked:
+                done(message_id, self.error_type("Message nacked by broker"))
+            elif message_id in self._returned:
+                self._returned.discard(message_id)
+                done(message_id, self.error_type(
+                    "Message returned by broker: no queue bound for routing key"))
+            else:
+                done(message_id, None)
+
+    def _fail_unconfirmed(self, error: BaseException) -> None:
+        pending = list(self._unconfirmed.values())
+        self._unconfirmed.clear()
+        for message_id, done in pending:
+            done(message_id, error)
+
+    def _fail_outbox(self, error: BaseException) -> None:
+        while True:
+            try:
+                _, _, message_id, done = self._outbox.get_nowait()
+            except queue.Empty:
+                return
+            done(message_id, error)
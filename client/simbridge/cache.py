@@ -0,0 +1,171 @@
+"""Content-addressed, on-disk cache of deterministic simulation results.
+
+The key is a SHA-256 digest of the canonical JSON of the fields that
+determine a simulation's outcome (``simulator``, ``type``, ``file``,
+``inputs``, ``outputs``); per-request fields such as ``request_id``,
+``client_id`` or ``timestamp`` are ignored. Entries live in a local SQLite
+database and are evicted by age (TTL), then least-recently-used order when
+the store exceeds its entry or byte budget. The entry count and total size
+are tracked in memory, and hits record their access time in batches, so the
+cache assumes it is the only writer of its database.
+
+Only cache simulations that are deterministic for a given input.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+# Cache modes
+BYPASS = "bypass"              # neither read nor write the cache
+READ_THROUGH = "read-through"  # answer hits locally, store misses
+REFRESH = "refresh"            # always run, overwrite the cached result
+MODES = (BYPASS, READ_THROUGH, REFRESH)
+
+KEY_FIELDS = ("simulator", "type", "file", "inputs", "outputs")
+
+
+def cache_key(simulation: Dict[str, Any]) -> str:
+    """Return the canonical hash of the outcome-determining fields."""
+    identity = {field: simulation.get(field) for field in KEY_FIELDS}
+    canonical = json.dumps(identity, sort_keys=True, separators=(",", ":"),
+                           default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """LRU/TTL-evicting result store backed by SQLite.
+
+    Args:
+        path: Database file (created if missing).
+        mode: One of :data:`MODES`.
+        ttl: Seconds an entry stays valid; ``None`` disables expiry.
+        max_entries: Maximum number of entries kept.
+        max_bytes: Maximum total size of the stored results.
+        access_batch: Number of hits whose access time is buffered before it
+            is written (also written on eviction and on :meth:`close`).
+    """
+
+    def __init__(self, path: str = ".simcache.sqlite", mode: str = READ_THROUGH,
+                 ttl: Optional[float] = 7 * 24 * 3600,
+                 max_entries: int = 100_000, max_bytes: int = 256 * 1024 * 1024,
+                 access_batch: int = 64):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode '{mode}'; use one of {MODES}")
+        self.mode = mode
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.access_batch = max(1, access_batch)
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+        self._db.commit()
+        self._count, self._bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        self._accessed: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "ResultCache":
+        """Build a cache from a ``cache:`` configuration mapping."""
+        return cls(path=cfg.get("path", ".simcache.sqlite"),
+                   mode=cfg.get("mode", READ_THROUGH),
+                   ttl=cfg.get("ttl", 7 * 24 * 3600),
+                   max_entries=int(cfg.get("max_entries", 100_000)),
+                   max_bytes=int(cfg.get("max_bytes", 256 * 1024 * 1024)),
+                   access_batch=int(cfg.get("access_batch", 64)))
+
+    def get(self, simulation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached result for *simulation*, or ``None``.
+
+        Always ``None`` unless the cache is in read-through mode.
+        """
+        if self.mode != READ_THROUGH:
+            return None
+        key = cache_key(simulation)
+        row = self._db.execute(
+            "SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+            self.misses += 1
+            return None
+        self._accessed[key] = now
+        if len(self._accessed) >= self.access_batch:
+            self._flush_accessed()
+            self._db.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, simulation: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Store the completed *result* of *simulation* and evict as needed."""
+        if self.mode == BYPASS or result.get("status") != "completed":
+            return
+        key = cache_key(simulation)
+        value = json.dumps(result, default=str)
+        now = time.time()
+        previous = self._db.execute(
+            "SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, value, size, created, accessed)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value), now, now))
+        self._accessed.pop(key, None)
+        if previous is None:
+            self._count += 1
+        else:
+            self._bytes -= previous[0]
+        self._bytes += len(value)
+        self._evict(now)
+        self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl is not None:
+            expired, expired_size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results WHERE created < ?",
+                (now - self.ttl,)).fetchone()
+            if expired:
+                self._db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+                self._count -= expired
+                self._bytes -= expired_size
+        if self._count <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        self._flush_accessed()
+        count, size = self._count, self._bytes
+        # Evict down to a low-water mark so the next puts don't scan again
+        max_count, max_size = int(self.max_entries * 0.9), int(self.max_bytes * 0.9)
+        victims = []
+        for key, entry_size in self._db.execute(
+                "SELECT key, size FROM results ORDER BY accessed ASC"):
+            if count <= max_count and size <= max_size:
+                break
+            victims.append((key,))
+            count -= 1
+            size -= entry_size
+        self._db.executemany("DELETE FROM results WHERE key = ?", victims)
+        self._count, self._bytes = count, size
+
+    def _flush_accessed(self) -> None:
+        """Write the buffered access times of recent hits."""
+        if self._accessed:
+            self._db.executemany("UPDATE results SET accessed = ? WHERE key = ?",
+                                 [(accessed, key) for key, accessed in self._accessed.items()])
+            self._accessed.clear()
+
+    def close(self) -> None:
+        """Write the buffered access times and close the underlying database."""
+        self._flush_accessed()
+        self._db.commit()
+        self._db.close()
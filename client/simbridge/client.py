@@ -0,0 +1,165 @@
+"""Unified asyncio client for the simulation bridge.
+
+:class:`SimulationClient` offers the same API over every transport::
+
+    async with SimulationClient("mqtt", load_config("mqtt/mqtt_use.yaml")) as client:
+        stream = await client.submit(request)
+        async for message in stream:
+            ...
+
+``submit`` waits for a free slot in the in-flight window, hands the request
+to the transport's pooled connection and returns a :class:`ResultStream`.
+The slot is released when the stream ends.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import uuid
+from typing import Any, Dict, Optional
+
+import yaml
+
+from .streams import BLOCK, OVERFLOW_POLICIES, ResultStream
+from .template import RequestTemplate, utc_timestamp
+from .transports import Transport, create_transport
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """Load a YAML configuration file.
+
+    Raises:
+        FileNotFoundError: If *path* does not exist.
+        yaml.YAMLError: If the file is not valid YAML.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return yaml.safe_load(file) or {}
+
+
+class SimulationClient:
+    """Submit simulations over a pluggable transport with a bounded window.
+
+    Args:
+        transport: Transport name (``rest``, ``mqtt``, ``rabbitmq``) or an
+            already built :class:`Transport`.
+        config: Transport configuration (the matching ``*_use.yaml``);
+            ignored when *transport* is an instance.
+        window: Maximum number of simulations in flight.
+        stream_buffer: Maximum number of unconsumed messages per result
+            stream (0 for unbounded).
+        overflow: Policy of full streams: ``block``, ``drop-oldest`` or
+            ``coalesce`` (see :class:`ResultStream`).
+        **transport_options: Extra keyword arguments for the transport.
+    """
+
+    def __init__(self, transport: Any, config: Optional[Dict[str, Any]] = None,
+                 window: int = 64, stream_buffer: int = 0, overflow: str = BLOCK,
+                 **transport_options: Any):
+        if isinstance(transport, Transport):
+            self.transport = transport
+        else:
+            self.transport = create_transport(transport, config or {}, **transport_options)
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'")
+        self.window = window
+        self.stream_buffer = stream_buffer
+        self.overflow = overflow
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, ResultStream] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of submitted simulations whose stream has not ended."""
+        return len(self._in_flight)
+
+    @property
+    def lag(self) -> Dict[str, int]:
+        """Unconsumed messages per in-flight request."""
+        return {request_id: stream.lag for request_id, stream in self._in_flight.items()}
+
+    async def connect(self) -> None:
+        """Open the transport's connection."""
+        self._slots = asyncio.Semaphore(self.window)
+        await self.transport.connect()
+
+    async def close(self) -> None:
+        """Close the transport; open streams end with ``TransportError``."""
+        await self.transport.close()
+
+    async def __aenter__(self) -> "SimulationClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @staticmethod
+    def prepare(request: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of *request* with a ``request_id`` and ``timestamp``."""
+        request = copy.copy(request)
+        simulation = dict(request.get("simulation") or {})
+        simulation.setdefault("request_id", uuid.uuid4().hex)
+        simulation.setdefault("timestamp", utc_timestamp())
+        request["simulation"] = simulation
+        return request
+
+    async def submit(self, request: Dict[str, Any],
+                     template: Optional[RequestTemplate] = None) -> ResultStream:
+        """Submit *request* once a window slot is free.
+
+        A ``request_id`` is generated when the request has none. When
+        *request* was built from *template*, it is encoded from the
+        template's pre-serialised fields.
+
+        Returns:
+            ResultStream: Async iterator over the request's results.
+
+        Raises:
+            RuntimeError: If the client is not connected.
+            ValueError: If the ``request_id`` is already in flight.
+            TransportError: If the transport could not submit the request.
+        """
+        if self._slots is None:
+            raise RuntimeError("call connect() first")
+        request = self.prepare(request)
+        request_id = request["simulation"]["request_id"]
+        if request_id in self._in_flight:
+            raise ValueError(f"Request {request_id} is already in flight")
+        request = self.transport.prepare(request)
+        body = template.encode(request) if template is not None else None
+        await self._slots.acquire()
+        if request_id in self._in_flight:
+            # Submitted concurrently while this call waited for its slot
+            self._slots.release()
+            raise ValueError(f"Request {request_id} is already in flight")
+        stream = ResultStream(request_id, self.stream_buffer, self.overflow)
+        self._in_flight[request_id] = stream
+        stream.add_done_callback(self._release)
+        try:
+            await self.transport.send(request, stream, body)
+        except BaseException as exc:
+            stream.fail(exc)
+            raise
+        return stream
+
+    def _release(self, stream: ResultStream) -> None:
+        if self._in_flight.get(stream.request_id) is stream:
+            del self._in_flight[stream.request_id]
+        self._slots.release()
+
+    async def run(self, request: Dict[str, Any], timeout: Optional[float] = None,
+                  template: Optional[RequestTemplate] = None) -> Dict[str, Any]:
+        """Submit *request* and return its terminal message.
+
+        Progress messages are discarded as they arrive.
+        """
+        stream = await self.submit(request, template)
+        stream.final_only()
+        try:
+            return await stream.result(timeout)
+        except asyncio.TimeoutError:
+            stream.fail(asyncio.TimeoutError(f"No final result for {stream.request_id}"))
+            raise
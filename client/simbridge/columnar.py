@@ -0,0 +1,169 @@
+"""Columnar accumulation of streamed simulation outputs.
+
+:class:`ColumnarSink` turns the per-step result messages of streaming
+simulations into NumPy column buffers: every numeric field found under
+``data`` (streaming steps) or ``outputs`` (final results) becomes a float64
+column named after its section (``data.x``, ``outputs.x``); nested mappings
+are flattened with ``.`` and numeric lists with an index suffix
+(``data.pos.0``, ``data.pos.1``...). Rows that lack a field hold NaN. The
+section prefix keeps fields apart from each other and from the ``request``
+and ``sequence`` bookkeeping columns.
+
+Buffers grow geometrically and are flushed to numbered ``.npz`` chunks once
+they reach ``chunk_rows`` rows, so memory stays constant for long runs.
+:func:`load_columns` concatenates the chunks back into arrays.
+
+Requires NumPy.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+REQUEST_COLUMN = "request"
+SEQUENCE_COLUMN = "sequence"
+REQUESTS_KEY = "__requests__"
+SECTIONS = ("data", "outputs")
+
+
+def numeric_fields(value: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield ``(name, value)`` for every numeric leaf of *value*."""
+    if isinstance(value, (bool, int, float)):
+        yield prefix or "value", float(value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from numeric_fields(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, (list, tuple)):
+        for index, item in enumerate(value):
+            yield from numeric_fields(item, f"{prefix}.{index}" if prefix else str(index))
+
+
+class ColumnarSink:
+    """Append-only column store for streamed numeric outputs.
+
+    Args:
+        path: Directory receiving the ``part-NNNNN.npz`` chunks, or ``None``
+            to keep everything in memory (no flushing).
+        chunk_rows: Rows buffered before a chunk is written.
+        compress: Write compressed ``.npz`` chunks.
+    """
+
+    def __init__(self, path: Optional[str] = None, chunk_rows: int = 65536,
+                 compress: bool = False):
+        self.path = path
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.compress = compress
+        self.rows = 0
+        self.flushed_rows = 0
+        self._capacity = 1024
+        self._columns: Dict[str, np.ndarray] = {}
+        self._requests: Dict[str, int] = {}
+        self._chunk = 0
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._chunk = len(glob.glob(os.path.join(path, "part-*.npz")))
+
+    def _column(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            column = np.full(self._capacity, np.nan)
+            self._columns[name] = column
+        return column
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.full(self._capacity, np.nan)
+            grown[:self.rows] = column[:self.rows]
+            self._columns[name] = grown
+
+    def append(self, message: Dict[str, Any]) -> bool:
+        """Add one result message as a row.
+
+        Returns:
+            bool: False if the message carried no numeric output.
+        """
+        fields = [field for section in SECTIONS
+                  for field in numeric_fields(message.get(section), section)]
+        if not fields:
+            return False
+        if self.rows == self._capacity:
+            self._grow()
+        row = self.rows
+        request_id = str(message.get("request_id", ""))
+        code = self._requests.setdefault(request_id, len(self._requests))
+        self._column(REQUEST_COLUMN)[row] = code
+        sequence = message.get("sequence")
+        if isinstance(sequence, (int, float)):
+            self._column(SEQUENCE_COLUMN)[row] = sequence
+        for name, value in fields:
+            self._column(name)[row] = value
+        self.rows += 1
+        if self.path is not None and self.rows >= self.chunk_rows:
+            self.flush()
+        return True
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return views of the buffered (not yet flushed) rows."""
+        return {name: column[:self.rows] for name, column in self._columns.items()}
+
+    def request_ids(self) -> List[str]:
+        """Return request ids indexed by the codes in the ``request`` column."""
+        return list(self._requests)
+
+    def flush(self) -> Optional[str]:
+        """Write the buffered rows as the next chunk and reset the buffers.
+
+        Returns:
+            str: Path of the written chunk, or None if nothing was written.
+        """
+        if self.path is None or self.rows == 0:
+            return None
+        target = os.path.join(self.path, f"part-{self._chunk:05d}.npz")
+        arrays = self.columns()
+        arrays[REQUESTS_KEY] = np.array(self.request_ids(), dtype=str)
+        (np.savez_compressed if self.compress else np.savez)(target, **arrays)
+        self._chunk += 1
+        self.flushed_rows += self.rows
+        self.rows = 0
+        self._capacity = 1024
+        self._columns = {}
+        self._requests = {}
+        return target
+
+    def close(self) -> None:
+        """Flush any buffered rows."""
+        self.flush()
+
+
+def load_columns(path: str) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Concatenate the chunks written by a :class:`ColumnarSink`.
+
+    Returns:
+        tuple: ``(columns, request_ids)`` where ``columns['request']``
+        indexes into ``request_ids``. Columns absent from a chunk are
+        NaN-filled for its rows.
+    """
+    parts = []
+    for part in sorted(glob.glob(os.path.join(path, "part-*.npz"))):
+        with np.load(part) as data:
+            parts.append({name: data[name] for name in data.files})
+    names = sorted({name for part in parts for name in part} - {REQUESTS_KEY})
+    all_requests: Dict[str, int] = {}
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in names}
+    for part in parts:
+        rows = len(part[REQUEST_COLUMN])
+        remap = np.array([all_requests.setdefault(rid, len(all_requests))
+                          for rid in part[REQUESTS_KEY]], dtype=float)
+        for name in names:
+            if name == REQUEST_COLUMN:
+                columns[name].append(remap[part[name].astype(int)])
+            else:
+                columns[name].append(part.get(name, np.full(rows, np.nan)))
+    merged = {name: np.concatenate(chunks) if chunks else np.empty(0)
+              for name, chunks in columns.items()}
+    return merged, np.array(list(all_requests), dtype=str)
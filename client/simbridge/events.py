@@ -0,0 +1,110 @@
+"""Bounded event bus between network threads and result handlers.
+
+Network callbacks (paho's loop thread, pika's I/O thread) must return
+quickly: while they run a handler, keepalives and acknowledgements stall.
+:class:`EventBus` decouples them from the handlers. Each named route owns a
+bounded queue drained by a dedicated worker thread, so a slow handler (a
+sink flushing a chunk to disk) neither blocks the network thread nor delays
+the other routes::
+
+    bus = EventBus({"display": show, "sink": sink.append}, maxsize=1024)
+    publish = bus.publisher("sink")     # resolved once, outside the hot path
+    publish(message)                    # blocks while the route's queue is full
+    ...
+    bus.close()                         # drains the queues, joins the workers
+
+A full queue blocks the publisher. This backpressure reaches the broker,
+because a blocked network thread stops reading from its socket.
+:meth:`EventBus.stats` reports queue depths for monitoring.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+_STOP = object()
+
+
+class _Route:
+    """One handler with its queue, worker thread and counters."""
+
+    def __init__(self, name: str, handler: Callable[[Any], None], maxsize: int):
+        self.name = name
+        self.handler = handler
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize)
+        self.peak = 0
+        self.delivered = 0
+        self.failed = 0
+        self.thread = threading.Thread(target=self._run, name=f"events-{name}",
+                                       daemon=True)
+
+    def put(self, event: Any, timeout: Optional[float] = None) -> None:
+        self.queue.put(event, timeout=timeout)
+        depth = self.queue.qsize()
+        if depth > self.peak:
+            self.peak = depth
+
+    def _run(self) -> None:
+        while True:
+            event = self.queue.get()
+            if event is _STOP:
+                return
+            try:
+                self.handler(event)
+                self.delivered += 1
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.failed += 1
+                traceback.print_exc()
+
+
+class EventBus:
+    """Deliver events to named handlers on dedicated threads.
+
+    Args:
+        handlers: Handler per route name; each is called with one event at a
+            time, in publication order.
+        maxsize: Capacity of each route's queue (0 for unbounded).
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[Any], None]], maxsize: int = 1024):
+        self._routes = {name: _Route(name, handler, maxsize)
+                        for name, handler in handlers.items()}
+        for route in self._routes.values():
+            route.thread.start()
+
+    def publisher(self, name: str) -> Callable[..., None]:
+        """Return the ``publish(event, timeout=None)`` function of route *name*.
+
+        Raises:
+            KeyError: If there is no such route.
+        """
+        return self._routes[name].put
+
+    def publish(self, name: str, event: Any, timeout: Optional[float] = None) -> None:
+        """Queue *event* for route *name*, waiting while its queue is full.
+
+        Raises:
+            KeyError: If there is no such route.
+            queue.Full: If *timeout* expires first.
+        """
+        self._routes[name].put(event, timeout)
+
+    def depths(self) -> Dict[str, int]:
+        """Return the number of queued events per route."""
+        return {name: route.queue.qsize() for name, route in self._routes.items()}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return depth, peak depth, delivered and failed counts per route."""
+        return {name: {"depth": route.queue.qsize(), "peak": route.peak,
+                       "delivered": route.delivered, "failed": route.failed}
+                for name, route in self._routes.items()}
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Deliver the queued events, then stop the workers."""
+        for route in self._routes.values():
+            route.queue.put(_STOP)
+        for route in self._routes.values():
+            route.thread.join(timeout)
@@ -0,0 +1,180 @@
+"""Hedged and failover submission across two transports.
+
+:class:`HedgedClient` submits every request through a primary
+:class:`~simbridge.client.SimulationClient`. If no message (``processing``,
+progress or a result) arrives within the latency budget, or the primary
+fails before sending anything, the same request, with the same
+``request_id``, is submitted through a secondary client. The first stream to
+deliver a message wins; the other one is failed and its window slot
+released, and anything it receives afterwards is discarded::
+
+    primary = SimulationClient("rest", load_config("rest/rest_use.yaml"))
+    secondary = SimulationClient("mqtt", load_config("mqtt/mqtt_use.yaml"))
+    async with HedgedClient(primary, secondary, budget=2.0) as client:
+        final = await client.run(request, timeout=600)
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+from .client import SimulationClient
+from .streams import ResultStream
+from .template import RequestTemplate
+from .transports import TransportError
+
+
+class HedgedClient:
+    """Hedge slow requests of a primary client onto a secondary one.
+
+    Args:
+        primary: Client every request is submitted to first.
+        secondary: Client used for hedged and failed-over submissions.
+        budget: Seconds to wait for the primary's first message before
+            hedging.
+        failover: Resubmit immediately when the primary fails before its
+            first message, without waiting for the budget.
+    """
+
+    def __init__(self, primary: SimulationClient, secondary: SimulationClient,
+                 budget: float, failover: bool = True):
+        if budget < 0:
+            raise ValueError("budget must not be negative")
+        self.primary = primary
+        self.secondary = secondary
+        self.budget = budget
+        self.failover = failover
+        self.hedged = 0
+        self.secondary_wins = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of simulations in flight on the primary client."""
+        return self.primary.in_flight
+
+    async def connect(self) -> None:
+        """Connect both clients."""
+        await asyncio.gather(self.primary.connect(), self.secondary.connect())
+
+    async def close(self) -> None:
+        """Cancel pending hedges and close both clients."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(self.primary.close(), self.secondary.close(),
+                             return_exceptions=True)
+
+    async def __aenter__(self) -> "HedgedClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def submit(self, request: Dict[str, Any],
+                     template: Optional[RequestTemplate] = None) -> ResultStream:
+        """Submit *request* to the primary client and hedge it if needed.
+
+        Waits for a slot in the primary's window. If the primary cannot
+        submit at all, the request fails over to the secondary at once.
+
+        Returns:
+            ResultStream: Stream relaying the messages of the winning
+            submission, bounded like the primary client's streams.
+        """
+        request = SimulationClient.prepare(request)
+        outer = ResultStream(request["simulation"]["request_id"],
+                             self.primary.stream_buffer, self.primary.overflow)
+        try:
+            primary = await self.primary.submit(request, template)
+        except TransportError:
+            if not self.failover:
+                raise
+            primary = None
+        task = asyncio.ensure_future(self._race(request, template, primary, outer))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        outer.add_done_callback(lambda _stream: task.cancel())
+        return outer
+
+    async def run(self, request: Dict[str, Any], timeout: Optional[float] = None,
+                  template: Optional[RequestTemplate] = None) -> Dict[str, Any]:
+        """Submit *request* and return its terminal message.
+
+        Progress messages are discarded as they arrive.
+        """
+        stream = await self.submit(request, template)
+        stream.final_only()
+        try:
+            return await stream.result(timeout)
+        except asyncio.TimeoutError:
+            stream.fail(asyncio.TimeoutError(f"No final result for {stream.request_id}"))
+            raise
+
+    async def _race(self, request: Dict[str, Any], template: Optional[RequestTemplate],
+                    primary: Optional[ResultStream], outer: ResultStream) -> None:
+        streams: List[ResultStream] = []
+        relays: List[asyncio.Task] = []
+        first = asyncio.get_running_loop().create_future()
+        winner: Optional[ResultStream] = None
+
+        async def relay(stream: ResultStream) -> Optional[BaseException]:
+            nonlocal winner
+            try:
+                async for message in stream:
+                    if winner is None:
+                        winner = stream
+                        if stream is not primary:
+                            self.secondary_wins += 1
+                        if not first.done():
+                            first.set_result(stream)
+                        for other in streams:
+                            if other is not stream:
+                                other.fail(TransportError("Duplicate hedged stream discarded"))
+                    if winner is not stream:
+                        return None
+                    await outer.writable()
+                    outer.push(message)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                if winner is stream:
+                    outer.fail(exc)
+                return exc
+            return None
+
+        def start(stream: ResultStream) -> None:
+            streams.append(stream)
+            relays.append(asyncio.ensure_future(relay(stream)))
+
+        try:
+            if primary is not None:
+                start(primary)
+                done, _ = await asyncio.wait([relays[0], first], timeout=self.budget,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                hedge = not first.done() and (self.failover or not done)
+            else:
+                hedge = True
+            if hedge:
+                self.hedged += 1
+                try:
+                    secondary = await self.secondary.submit(request, template)
+                except TransportError as exc:
+                    if primary is None:
+                        outer.fail(exc)
+                        return
+                else:
+                    if winner is None:
+                        start(secondary)
+                    else:
+                        # The primary answered while the secondary waited for a slot
+                        secondary.fail(TransportError("Duplicate hedged stream discarded"))
+            errors = await asyncio.gather(*relays)
+            if not outer.done:
+                outer.fail(next((exc for exc in reversed(errors) if exc is not None),
+                                TransportError("Hedged request ended without a result")))
+        finally:
+            for task in relays:
+                task.cancel()
+            for stream in streams:
+                stream.fail(TransportError("Hedged request cancelled"))
@@ -0,0 +1,15 @@
+"""Offline stand-in for the simulation bridge, for benchmarking the clients.
+
+* :mod:`.results` generates synthetic batch / streaming / interactive result
+  sequences at a configurable rate and payload size.
+* :mod:`.rest` serves them over the REST adapter's NDJSON contract.
+* :mod:`.auth` verifies bearer tokens with a bounded cache (PyJWT).
+* :mod:`.mqtt` is a minimal embedded MQTT 3.1.1 / 5 broker that answers requests
+  published on the input topic.
+* :mod:`.amqp` is an in-process fake of the pika ``SelectConnection`` API
+  used by the RabbitMQ client.
+"""
+
+from .results import ResultProfile, synthetic_results
+
+__all__ = ["ResultProfile", "synthetic_results"]
@@ -0,0 +1,246 @@
+"""In-process fake of the pika ``SelectConnection`` API used by the clients.
+
+:class:`FakeAMQPConnection` accepts the same constructor arguments as
+``pika.SelectConnection`` and supports the calls the RabbitMQ client makes:
+topology declarations, publisher confirms (acknowledged cumulatively once
+per I/O-loop turn), ``basic_consume``, ``basic_publish`` and acks. Each
+published request is answered with synthetic results delivered to the
+consumer, so client overhead can be measured without a broker or network.
+
+Use :func:`connection_factory` to bind a result profile::
+
+    RabbitMQClient(config, connection_factory=connection_factory(profile))
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import queue
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, List, Optional
+
+import pika
+
+from .results import ResultProfile, parse_request, synthetic_results
+
+
+class FakeIOLoop:
+    """Single-threaded callback loop with thread-safe scheduling and timers."""
+
+    def __init__(self):
+        self._callbacks: "queue.SimpleQueue[Callable[[], None]]" = queue.SimpleQueue()
+        self._timers: List[tuple] = []
+        self._sequence = itertools.count()
+        self._stopping = False
+
+    def add_callback_threadsafe(self, callback: Callable[[], None]) -> None:
+        """Schedule *callback* on the loop thread; callable from any thread."""
+        self._callbacks.put(callback)
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> None:
+        """Run *callback* after *delay* seconds (loop thread only)."""
+        heapq.heappush(self._timers,
+                       (time.monotonic() + delay, next(self._sequence), callback))
+
+    def start(self) -> None:
+        """Run callbacks until :meth:`stop` is called."""
+        while not self._stopping:
+            timeout = None
+            if self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+            try:
+                callback = self._callbacks.get(timeout=timeout)
+            except queue.Empty:
+                callback = None
+            if callback is not None:
+                callback()
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                heapq.heappop(self._timers)[2]()
+
+    def stop(self) -> None:
+        """Stop the loop after the current callback."""
+        self._stopping = True
+        self._callbacks.put(lambda: None)
+
+
+class FakeChannel:  # pylint: disable=too-many-instance-attributes
+    """Channel answering every published request with synthetic results."""
+
+    def __init__(self, connection: "FakeAMQPConnection"):
+        self.connection = connection
+        self.is_open = True
+        self.published = 0
+        self.acked = 0
+        self.prefetch = 0
+        self.channel_prefetch = 0
+        self.consumer_prefetch: List[int] = []
+        self._close_callbacks: List[Callable] = []
+        self._return_callbacks: List[Callable] = []
+        self._consumers: List[Callable] = []
+        self._confirm: Optional[Callable] = None
+        self._publish_tag = 0
+        self._ack_scheduled = False
+        self._delivery_tag = 0
+
+    def _ok(self, callback: Optional[Callable]) -> None:
+        if callback is not None:
+            self.connection.ioloop.add_callback_threadsafe(
+                lambda: callback(SimpleNamespace(method=None)))
+
+    def exchange_declare(self, exchange, exchange_type="direct", durable=False,  # pylint: disable=unused-argument,too-many-arguments
+                         callback=None, **kwargs):
+        """Pretend to declare an exchange."""
+        self._ok(callback)
+
+    def queue_declare(self, queue, durable=False, callback=None, **kwargs):  # pylint: disable=unused-argument,redefined-outer-name
+        """Pretend to declare a queue."""
+        self._ok(callback)
+
+    def queue_bind(self, queue, exchange, routing_key=None, callback=None, **kwargs):  # pylint: disable=unused-argument,redefined-outer-name,too-many-arguments
+        """Pretend to bind a queue."""
+        self._ok(callback)
+
+    def basic_qos(self, prefetch_count=0, global_qos=False, callback=None, **kwargs):  # pylint: disable=unused-argument
+        """Record a prefetch setting the way RabbitMQ applies it.
+
+        A per-consumer limit only applies to consumers created afterwards; a
+        ``global_qos`` limit applies to the whole channel at once. Deliveries
+        are not throttled.
+        """
+        if global_qos:
+            self.channel_prefetch = prefetch_count
+        else:
+            self.prefetch = prefetch_count
+        self._ok(callback)
+
+    def effective_prefetch(self, consumer: int = 0) -> int:
+        """Return the prefetch limit in force for the *consumer*-th consumer."""
+        limits = [limit for limit in (self.consumer_prefetch[consumer], self.channel_prefetch)
+                  if limit]
+        return min(limits) if limits else 0
+
+    def confirm_delivery(self, ack_nack_callback, callback=None):
+        """Enable publisher confirms."""
+        self._confirm = ack_nack_callback
+        self._ok(callback)
+
+    def basic_consume(self, queue, on_message_callback, auto_ack=False, **kwargs):  # pylint: disable=unused-argument,redefined-outer-name
+        """Register the consumer receiving synthetic results."""
+        self._consumers.append(on_message_callback)
+        self.consumer_prefetch.append(self.prefetch)
+        return f"ctag{len(self._consumers)}"
+
+    def basic_ack(self, delivery_tag=0, multiple=False):  # pylint: disable=unused-argument
+        """Count an acknowledged delivery."""
+        self.acked += 1
+
+    def basic_nack(self, delivery_tag=0, multiple=False, requeue=True):  # pylint: disable=unused-argument
+        """Count a rejected delivery."""
+
+    def add_on_close_callback(self, callback: Callable) -> None:
+        """Register *callback(channel, reason)* for channel closure."""
+        self._close_callbacks.append(callback)
+
+    def add_on_return_callback(self, callback: Callable) -> None:
+        """Register a return callback (the fake never returns messages)."""
+        self._return_callbacks.append(callback)
+
+    def basic_publish(self, exchange, routing_key, body, properties=None,  # pylint: disable=unused-argument,too-many-arguments
+                      mandatory=False):
+        """Accept a request, confirm it and schedule its results."""
+        self.published += 1
+        if self._confirm is not None:
+            self._publish_tag += 1
+            if not self._ack_scheduled:
+                self._ack_scheduled = True
+                self.connection.ioloop.add_callback_threadsafe(self._send_ack)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        content_type = getattr(properties, "content_type", "") or ""
+        try:
+            request = parse_request(body, content_type)
+        except ValueError:
+            return
+        self._schedule(synthetic_results(request, self.connection.profile), 0.0)
+
+    def _send_ack(self) -> None:
+        self._ack_scheduled = False
+        if self.is_open:
+            self._confirm(SimpleNamespace(method=pika.spec.Basic.Ack(
+                delivery_tag=self._publish_tag, multiple=True)))
+
+    def _schedule(self, results, offset: float) -> None:
+        for delay, result in results:
+            offset += delay
+            if offset > 0:
+                self.connection.ioloop.call_later(
+                    offset, lambda r=result, rest=results: self._deliver(r, rest))
+                return
+            self._deliver(result, None)
+
+    def _deliver(self, result: dict, rest: Any) -> None:
+        if not self.is_open:
+            return
+        body = json.dumps(result).encode("utf-8")
+        for consumer in self._consumers:
+            self._delivery_tag += 1
+            method = SimpleNamespace(routing_key=f"{result.get('source')}.result",
+                                     delivery_tag=self._delivery_tag)
+            consumer(self, method, pika.BasicProperties(
+                content_type="application/json"), body)
+        if rest is not None:
+            self._schedule(rest, 0.0)
+
+    def close(self, reply_code=200, reply_text="Normal shutdown"):  # pylint: disable=unused-argument
+        """Close the channel, then the connection."""
+        if not self.is_open:
+            return
+        self.is_open = False
+        for callback in self._close_callbacks:
+            self.connection.ioloop.add_callback_threadsafe(
+                lambda cb=callback: cb(self, reply_text))
+
+
+class FakeAMQPConnection:
+    """Drop-in replacement for ``pika.SelectConnection``."""
+
+    def __init__(self, parameters=None, on_open_callback=None,  # pylint: disable=unused-argument,too-many-arguments
+                 on_open_error_callback=None, on_close_callback=None,
+                 profile: Optional[ResultProfile] = None):
+        self.profile = profile or ResultProfile()
+        self.ioloop = FakeIOLoop()
+        self.is_closing = False
+        self.is_closed = False
+        self._on_close = on_close_callback
+        if on_open_callback is not None:
+            self.ioloop.add_callback_threadsafe(lambda: on_open_callback(self))
+
+    def channel(self, on_open_callback: Callable) -> FakeChannel:
+        """Open a channel and pass it to *on_open_callback*."""
+        channel = FakeChannel(self)
+        self.ioloop.add_callback_threadsafe(lambda: on_open_callback(channel))
+        return channel
+
+    def close(self, reply_code=200, reply_text="Normal shutdown"):  # pylint: disable=unused-argument
+        """Close the connection and notify the close callback."""
+        if self.is_closing or self.is_closed:
+            return
+        self.is_closing = True
+
+        def closed():
+            self.is_closing = False
+            self.is_closed = True
+            if self._on_close is not None:
+                self._on_close(self, reply_text)
+        self.ioloop.add_callback_threadsafe(closed)
+
+
+def connection_factory(profile: ResultProfile) -> Callable[..., FakeAMQPConnection]:
+    """Return a ``SelectConnection``-compatible factory bound to *profile*."""
+    def factory(**kwargs) -> FakeAMQPConnection:
+        return FakeAMQPConnection(profile=profile, **kwargs)
+    return factory
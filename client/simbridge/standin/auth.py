@@ -0,0 +1,86 @@
+"""Bearer token verification with a bounded cache, as in the REST adapter.
+
+Clients sign one HS256 token and reuse it until it expires, so verifying
+it from scratch on every request (base64 decoding, HMAC, claim checks) is
+wasted work. :class:`TokenVerifier` verifies a token once and remembers its
+claims under a digest of the token until it expires: at its ``exp``, or
+``max_token_age`` seconds after its ``iat``, whichever comes first.
+
+Requires PyJWT.
+"""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+
+
+class TokenVerifier:
+    """Verify HS256 bearer tokens, caching the claims of valid ones.
+
+    Args:
+        secret: Shared HMAC secret.
+        issuer: Required ``iss`` claim, or ``None`` to accept any issuer.
+        max_token_age: Seconds after ``iat`` a token stays acceptable, or
+            ``None`` for no limit beyond ``exp``.
+        cache_size: Maximum number of cached tokens (least recently used
+            entries are evicted; 0 disables the cache).
+    """
+
+    def __init__(self, secret: str, issuer: Optional[str] = None,
+                 max_token_age: Optional[float] = None, cache_size: int = 1024):
+        self.secret = secret
+        self.issuer = issuer
+        self.max_token_age = max_token_age
+        self.cache_size = max(0, cache_size)
+        self.hits = 0
+        self.misses = 0
+        self._cache: "collections.OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = \
+            collections.OrderedDict()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "TokenVerifier":
+        """Build a verifier from an ``auth:`` configuration mapping."""
+        max_age = cfg.get("max_token_age_seconds")
+        return cls(cfg["secret"], issuer=cfg.get("issuer"),
+                   max_token_age=float(max_age) if max_age is not None else None,
+                   cache_size=int(cfg.get("cache_size", 1024)))
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Return the claims of *token*.
+
+        Raises:
+            ValueError: If the token is malformed, badly signed, expired,
+                too old or from the wrong issuer.
+        """
+        now = time.time()
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        entry = self._cache.get(key)
+        if entry is not None:
+            if now < entry[0]:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return entry[1]
+            del self._cache[key]
+        self.misses += 1
+        options = {"require": ["exp", "iat"]} if self.max_token_age is not None \
+            else {"require": ["exp"]}
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=["HS256"],
+                                issuer=self.issuer, options=options)
+        except jwt.InvalidTokenError as exc:
+            raise ValueError(f"Invalid token: {exc}") from exc
+        expires = float(claims["exp"])
+        if self.max_token_age is not None:
+            expires = min(expires, float(claims["iat"]) + self.max_token_age)
+            if now >= expires:
+                raise ValueError("Invalid token: older than the maximum token age")
+        if self.cache_size:
+            self._cache[key] = (expires, claims)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
@@ -0,0 +1,376 @@
+"""Embedded MQTT 3.1.1 / 5 broker shim with a built-in stand-in bridge.
+
+Implements the subset of MQTT the example clients use: CONNECT,
+PUBLISH (QoS 0, 1 and 2 inbound; outbound delivery is QoS 0), SUBSCRIBE with
+``+``/``#`` wildcards and ``$share/<group>/<filter>`` shared subscriptions
+(each message goes to one member of the group, round robin), UNSUBSCRIBE,
+PINGREQ and DISCONNECT. Credentials are accepted without checks; retained
+messages and sessions are not supported. MQTT 5 clients are served too:
+packet properties are parsed, inbound topic aliases resolved, and outbound
+topics aliased up to the client's ``TopicAliasMaximum`` (the least recently
+used alias is remapped once all are taken). Properties of
+relayed messages are not forwarded.
+
+Every request published on ``input_topic`` is answered with synthetic
+results published on ``output_topic``, like ``MQTTAdapter`` does. The output
+topic may be a template with ``{client_id}`` and ``{request_id}`` fields
+(``bridge/output/{client_id}/{request_id}``), so that each client subscribes
+to its own results only (``bridge/output/<client_id>/#``). An MQTT 5
+request's ``ResponseTopic`` takes precedence over ``output_topic``, and its
+``CorrelationData`` is echoed on every result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import json
+import struct
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .results import ResultProfile, parse_request, synthetic_results
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+CONTENT_TYPE, RESPONSE_TOPIC, CORRELATION_DATA = 0x03, 0x08, 0x09
+TOPIC_ALIAS_MAXIMUM, TOPIC_ALIAS, USER_PROPERTY = 0x22, 0x23, 0x26
+
+# MQTT 5 property identifiers and the encoding of their values
+_PROPERTY_TYPES = {
+    0x01: "byte", 0x02: "u32", 0x03: "str", 0x08: "str", 0x09: "bin", 0x0B: "varint",
+    0x11: "u32", 0x12: "str", 0x13: "u16", 0x15: "str", 0x16: "bin", 0x17: "byte",
+    0x18: "u32", 0x19: "byte", 0x1A: "str", 0x1C: "str", 0x1F: "str", 0x21: "u16",
+    0x22: "u16", 0x23: "u16", 0x24: "byte", 0x25: "byte", 0x26: "pair", 0x27: "u32",
+    0x28: "byte", 0x29: "byte", 0x2A: "byte",
+}
+
+_TOPIC_UNSAFE = str.maketrans({"/": "_", "+": "_", "#": "_"})
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """Return True if *topic* matches the MQTT *topic_filter*."""
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level not in ("+", topic_levels[index]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def shared_filter(topic_filter: str) -> Tuple[Optional[str], str]:
+    """Split a ``$share/<group>/<filter>`` subscription into group and filter.
+
+    Returns ``(None, topic_filter)`` for an ordinary subscription.
+    """
+    if topic_filter.startswith("$share/"):
+        _, group, rest = topic_filter.split("/", 2)
+        return group, rest
+    return None, topic_filter
+
+
+def result_topic(template: str, simulation: Dict[str, Any]) -> str:
+    """Fill the ``{client_id}``/``{request_id}`` fields of an output topic.
+
+    Topic separators and wildcards in the values are replaced with ``_``.
+    """
+    if "{" not in template:
+        return template
+
+    def level(value: Any) -> str:
+        return str(value).translate(_TOPIC_UNSAFE)
+
+    return template.format(client_id=level(simulation.get("client_id", "unknown")),
+                           request_id=level(simulation.get("request_id", "unknown")))
+
+
+def _encode_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        out.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(out)
+
+
+def _decode_length(data: bytes, offset: int) -> Tuple[int, int]:
+    value, multiplier = 0, 1
+    while True:
+        byte = data[offset]
+        offset += 1
+        value += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            return value, offset
+        multiplier *= 128
+
+
+def _string(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return struct.pack("!H", len(raw)) + raw
+
+
+def _packet(kind: int, flags: int, body: bytes) -> bytes:
+    return bytes([kind << 4 | flags]) + _encode_length(len(body)) + body
+
+
+def read_properties(data: bytes, offset: int) -> Tuple[Dict[int, Any], int]:
+    """Parse an MQTT 5 property block at *offset*.
+
+    Returns:
+        tuple: ``(properties, offset after the block)``; user properties are
+        collected as a list of pairs.
+    """
+    length, offset = _decode_length(data, offset)
+    end = offset + length
+    properties: Dict[int, Any] = {}
+    while offset < end:
+        identifier = data[offset]
+        kind = _PROPERTY_TYPES.get(identifier)
+        offset += 1
+        if kind == "byte":
+            value, offset = data[offset], offset + 1
+        elif kind == "u16":
+            (value,), offset = struct.unpack_from("!H", data, offset), offset + 2
+        elif kind == "u32":
+            (value,), offset = struct.unpack_from("!I", data, offset), offset + 4
+        elif kind == "varint":
+            value, offset = _decode_length(data, offset)
+        elif kind in ("str", "bin", "pair"):
+            items = []
+            for _ in range(2 if kind == "pair" else 1):
+                (size,) = struct.unpack_from("!H", data, offset)
+                raw = data[offset + 2:offset + 2 + size]
+                items.append(raw if kind == "bin" else raw.decode("utf-8"))
+                offset += 2 + size
+            value = tuple(items) if kind == "pair" else items[0]
+        else:
+            break  # unknown property: skip the rest of the block
+        if identifier == USER_PROPERTY:
+            properties.setdefault(USER_PROPERTY, []).append(value)
+        else:
+            properties[identifier] = value
+    return properties, end
+
+
+def _properties(correlation: Optional[bytes] = None, content_type: Optional[str] = None,
+                alias: Optional[int] = None) -> bytes:
+    block = b""
+    if content_type is not None:
+        block += bytes([CONTENT_TYPE]) + _string(content_type)
+    if correlation is not None:
+        block += bytes([CORRELATION_DATA]) + struct.pack("!H", len(correlation)) + correlation
+    if alias is not None:
+        block += bytes([TOPIC_ALIAS]) + struct.pack("!H", alias)
+    return _encode_length(len(block)) + block
+
+
+class _Session:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.filters: Set[str] = set()
+        self.version = 4
+        self.alias_maximum = 0
+        self.aliases_out: "collections.OrderedDict[str, int]" = collections.OrderedDict()
+        self.aliases_in: Dict[int, str] = {}
+
+    def publish(self, topic: str, payload: bytes, correlation: Optional[bytes] = None,
+                content_type: Optional[str] = None) -> None:
+        """Send a QoS 0 PUBLISH, aliasing its topic when the client allows it."""
+        if self.version < 5:
+            self.writer.write(_packet(PUBLISH, 0, _string(topic) + payload))
+            return
+        alias = self.aliases_out.get(topic)
+        name = topic
+        if alias is not None:
+            name = ""
+            self.aliases_out.move_to_end(topic)
+        elif len(self.aliases_out) < self.alias_maximum:
+            alias = self.aliases_out[topic] = len(self.aliases_out) + 1
+        elif self.alias_maximum:
+            # Remap the least recently used alias by sending it with the topic name
+            _, alias = self.aliases_out.popitem(last=False)
+            self.aliases_out[topic] = alias
+        self.writer.write(_packet(PUBLISH, 0, _string(name) + _properties(
+            correlation, content_type, alias) + payload))
+
+
+class MQTTBrokerShim:
+    """Minimal in-process broker that also plays the bridge.
+
+    Args:
+        profile: Shape and pacing of the synthetic results.
+        host: Interface to bind.
+        port: TCP port to bind.
+        input_topic: Topic the bridge consumes requests from.
+        output_topic: Topic results are published on; may contain
+            ``{client_id}`` and ``{request_id}`` fields.
+
+    Raises:
+        ValueError: If *output_topic* is not a valid topic template.
+    """
+
+    def __init__(self, profile: ResultProfile, host: str = "127.0.0.1",  # pylint: disable=too-many-arguments
+                 port: int = 1883, input_topic: str = "bridge/input",
+                 output_topic: str = "bridge/output"):
+        self.profile = profile
+        self.host = host
+        self.port = port
+        self.input_topic = input_topic
+        try:
+            result_topic(output_topic, {"client_id": "client", "request_id": "request"})
+        except (AttributeError, IndexError, KeyError, ValueError) as exc:
+            raise ValueError(f"Invalid output_topic template '{output_topic}': {exc!r}") from None
+        self.output_topic = output_topic
+        self.requests = 0
+        self._sessions: List[_Session] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._share_cursor: Dict[str, int] = {}
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+
+    async def stop(self) -> None:
+        """Stop listening and cancel pending result sequences."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def publish(self, topic: str, payload: bytes, correlation: Optional[bytes] = None,
+                content_type: Optional[str] = None) -> None:
+        """Deliver *payload* at QoS 0 to every matching subscription.
+
+        Ordinary subscribers get one copy per session; each shared
+        subscription group gets one copy, sent to its members in turn.
+        *correlation* and *content_type* are sent to MQTT 5 sessions only.
+        """
+        groups: Dict[str, List[_Session]] = {}
+        for session in self._sessions:
+            delivered = False
+            for topic_filter in session.filters:
+                group, topic_filter = shared_filter(topic_filter)
+                if not topic_matches(topic_filter, topic):
+                    continue
+                if group is not None:
+                    groups.setdefault(group, []).append(session)
+                elif not delivered:
+                    session.publish(topic, payload, correlation, content_type)
+                    delivered = True
+        for group, members in groups.items():
+            turn = self._share_cursor.get(group, 0)
+            members[turn % len(members)].publish(topic, payload, correlation, content_type)
+            self._share_cursor[group] = turn + 1
+
+    async def _read_packet(self, reader: asyncio.StreamReader):
+        header = await reader.readexactly(1)
+        length, multiplier = 0, 1
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        body = await reader.readexactly(length) if length else b""
+        return header[0] >> 4, header[0] & 0x0F, body
+
+    async def _serve(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        session = _Session(writer)
+        self._sessions.append(session)
+        try:
+            while True:
+                kind, flags, body = await self._read_packet(reader)
+                if kind == DISCONNECT:
+                    break
+                self._handle(session, kind, flags, body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._sessions.remove(session)
+            writer.close()
+
+    def _handle(self, session: _Session, kind: int, flags: int, body: bytes) -> None:  # pylint: disable=too-many-branches
+        writer = session.writer
+        v5 = session.version >= 5
+        if kind == CONNECT:
+            (name_len,) = struct.unpack_from("!H", body)
+            offset = 2 + name_len
+            session.version = body[offset]
+            if session.version >= 5:
+                properties, _ = read_properties(body, offset + 4)
+                session.alias_maximum = properties.get(TOPIC_ALIAS_MAXIMUM, 0)
+                writer.write(_packet(CONNACK, 0, b"\x00\x00\x00"))
+            else:
+                writer.write(_packet(CONNACK, 0, b"\x00\x00"))
+        elif kind == PUBLISH:
+            qos = (flags >> 1) & 0x03
+            (topic_len,) = struct.unpack_from("!H", body)
+            topic = body[2:2 + topic_len].decode("utf-8")
+            offset = 2 + topic_len
+            if qos:
+                packet_id = body[offset:offset + 2]
+                offset += 2
+                writer.write(_packet(PUBACK if qos == 1 else PUBREC, 0, packet_id))
+            properties: Dict[int, Any] = {}
+            if v5:
+                properties, offset = read_properties(body, offset)
+                alias = properties.get(TOPIC_ALIAS)
+                if alias is not None:
+                    if topic:
+                        session.aliases_in[alias] = topic
+                    else:
+                        topic = session.aliases_in.get(alias, "")
+            self._on_publish(topic, body[offset:], properties)
+        elif kind == PUBREL:
+            writer.write(_packet(PUBCOMP, 0, body[:2]))
+        elif kind == SUBSCRIBE:
+            offset = read_properties(body, 2)[1] if v5 else 2
+            granted = bytearray()
+            while offset < len(body):
+                (size,) = struct.unpack_from("!H", body, offset)
+                session.filters.add(body[offset + 2:offset + 2 + size].decode("utf-8"))
+                offset += 3 + size
+                granted.append(0)
+            writer.write(_packet(SUBACK, 0, body[:2] + (b"\x00" if v5 else b"") + bytes(granted)))
+        elif kind == UNSUBSCRIBE:
+            offset = read_properties(body, 2)[1] if v5 else 2
+            removed = bytearray()
+            while offset < len(body):
+                (size,) = struct.unpack_from("!H", body, offset)
+                session.filters.discard(body[offset + 2:offset + 2 + size].decode("utf-8"))
+                offset += 2 + size
+                removed.append(0)
+            writer.write(_packet(UNSUBACK, 0, body[:2] + (b"\x00" + bytes(removed) if v5 else b"")))
+        elif kind == PINGREQ:
+            writer.write(_packet(PINGRESP, 0, b""))
+
+    def _on_publish(self, topic: str, payload: bytes, properties: Dict[int, Any]) -> None:
+        self.publish(topic, payload)
+        if topic != self.input_topic:
+            return
+        try:
+            message = parse_request(payload, properties.get(CONTENT_TYPE, ""))
+        except ValueError:
+            return
+        self.requests += 1
+        task = asyncio.ensure_future(self._answer(
+            message, properties.get(RESPONSE_TOPIC), properties.get(CORRELATION_DATA)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _answer(self, message: dict, response_topic: Optional[str] = None,
+                      correlation: Optional[bytes] = None) -> None:
+        topic = response_topic or result_topic(self.output_topic, message["simulation"])
+        for delay, result in synthetic_results(message, self.profile):
+            if delay:
+                await asyncio.sleep(delay)
+            self.publish(topic, json.dumps(result).encode(), correlation, "application/json")
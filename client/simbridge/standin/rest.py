@@ -0,0 +1,183 @@
+"""REST endpoint speaking the REST adapter's NDJSON streaming contract.
+
+A small HTTP/1.1 server on asyncio streams: ``POST <endpoint>`` with a
+``Bearer`` token and a YAML or JSON simulation body answers with a chunked
+``application/x-ndjson`` stream that starts with ``{"status": "processing"}``
+and ends after the ``completed`` message. Connections are kept alive.
+
+``POST <endpoint>/bulk`` accepts many simulations in one body (NDJSON lines,
+or YAML documents with a YAML content type), validates all of them first and
+answers with one NDJSON stream multiplexing their results, every message
+tagged with its ``request_id``. The stream ends after the last request's
+terminal message.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .results import ResultProfile, parse_request, parse_requests, synthetic_results
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized",
+           404: "Not Found", 405: "Method Not Allowed"}
+
+
+class RESTStandIn:
+    """Stand-in for ``RESTAdapter``.
+
+    Args:
+        profile: Shape and pacing of the synthetic results.
+        host: Interface to bind.
+        port: TCP port to bind.
+        endpoint: Path accepting simulation requests.
+        bulk_endpoint: Path accepting bulk submissions (``<endpoint>/bulk``
+            by default).
+        verifier: :class:`~simbridge.standin.auth.TokenVerifier` checking
+            bearer tokens; without one any bearer token is accepted.
+        reuse_port: Bind with ``SO_REUSEPORT`` so several worker processes
+            can share the port, the kernel spreading connections over them.
+    """
+
+    def __init__(self, profile: ResultProfile, host: str = "127.0.0.1",
+                 port: int = 5000, endpoint: str = "/message",
+                 bulk_endpoint: Optional[str] = None, verifier: Any = None,
+                 reuse_port: bool = False):
+        self.profile = profile
+        self.host = host
+        self.port = port
+        self.endpoint = endpoint
+        self.bulk_endpoint = bulk_endpoint or f"{endpoint.rstrip('/')}/bulk"
+        self.verifier = verifier
+        self.reuse_port = reuse_port
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port,
+                                                  reuse_port=self.reuse_port or None)
+
+    async def stop(self) -> None:
+        """Stop listening and close the server."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _read_request(self, reader: asyncio.StreamReader
+                            ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    def _authorize(self, headers: Dict[str, str]) -> Optional[str]:
+        """Return why the request's bearer token is refused, or None."""
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme != "Bearer" or not token:
+            return "Missing Bearer token"
+        if self.verifier is not None:
+            try:
+                self.verifier.verify(token)
+            except ValueError as exc:
+                return str(exc)
+        return None
+
+    @staticmethod
+    async def _reply(writer: asyncio.StreamWriter, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    @staticmethod
+    def _chunk(item: dict) -> bytes:
+        line = (json.dumps(item) + "\n").encode()
+        return f"{len(line):x}\r\n".encode() + line + b"\r\n"
+
+    async def _serve(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                denied = self._authorize(headers)
+                if path not in (self.endpoint, self.bulk_endpoint):
+                    await self._reply(writer, 404, {"error": "Not found"})
+                elif method != "POST":
+                    await self._reply(writer, 405, {"error": "Method not allowed"})
+                elif denied is not None:
+                    await self._reply(writer, 401, {"error": denied})
+                elif path == self.bulk_endpoint:
+                    try:
+                        messages = parse_requests(body, headers.get("content-type", ""))
+                    except ValueError as exc:
+                        await self._reply(writer, 400, {"error": str(exc)})
+                    else:
+                        await self._stream_bulk(writer, messages)
+                else:
+                    try:
+                        message = parse_request(body, headers.get("content-type", ""))
+                    except ValueError as exc:
+                        await self._reply(writer, 400, {"error": str(exc)})
+                    else:
+                        await self._stream(writer, message)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter, message: dict) -> None:
+        self.requests += 1
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\n\r\n")
+        writer.write(self._chunk({"status": "processing"}))
+        await writer.drain()
+        for delay, result in synthetic_results(message, self.profile):
+            if delay:
+                await asyncio.sleep(delay)
+            writer.write(self._chunk(result))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _stream_bulk(self, writer: asyncio.StreamWriter, messages: List[dict]) -> None:
+        self.requests += len(messages)
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\n\r\n")
+        for message in messages:
+            writer.write(self._chunk({"status": "processing",
+                                      "request_id": message["simulation"].get("request_id")}))
+        await writer.drain()
+        lock = asyncio.Lock()
+
+        async def answer(message: dict) -> None:
+            for delay, result in synthetic_results(message, self.profile):
+                if delay:
+                    await asyncio.sleep(delay)
+                async with lock:
+                    writer.write(self._chunk(result))
+                    await writer.drain()
+
+        await asyncio.gather(*(answer(message) for message in messages))
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
@@ -0,0 +1,143 @@
+"""Synthetic result sequences shaped like the agents' responses."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+
+import yaml
+
+from ..codec import JSON, CodecError, decode
+
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@dataclass
+class ResultProfile:
+    """How the stand-in answers a request.
+
+    Attributes:
+        latency: Seconds before the first result message.
+        rate: Result messages per second after the first (0 = no pacing).
+        steps: Number of ``streaming`` messages for streaming and
+            interactive simulations.
+        payload_fields: Numeric fields in each message's ``data``/``outputs``.
+        payload_size: Bytes of padding added to each message.
+    """
+
+    latency: float = 0.0
+    rate: float = 0.0
+    steps: int = 10
+    payload_fields: int = 4
+    payload_size: int = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "ResultProfile":
+        """Build a profile from a ``results:`` configuration mapping."""
+        return cls(latency=float(cfg.get("latency", 0.0)),
+                   rate=float(cfg.get("rate", 0.0)),
+                   steps=int(cfg.get("steps", 10)),
+                   payload_fields=int(cfg.get("payload_fields", 4)),
+                   payload_size=int(cfg.get("payload_size", 0)))
+
+
+def _check(message: Any) -> Dict[str, Any]:
+    if not isinstance(message, dict) or not isinstance(message.get("simulation"), dict):
+        raise ValueError("Request has no 'simulation' block")
+    return message
+
+
+def parse_request(body: bytes, content_type: str = "") -> Dict[str, Any]:
+    """Decode a request body with the codec of *content_type*.
+
+    The stand-in's own parsing cost is kept out of client benchmarks by
+    the fast JSON and libyaml codecs.
+
+    Raises:
+        ValueError: If the body is not a mapping with a ``simulation`` block.
+    """
+    try:
+        message = decode(body, content_type)
+    except CodecError as exc:
+        raise ValueError(f"Cannot parse request: {exc}") from exc
+    return _check(message)
+
+
+def parse_requests(body: bytes, content_type: str = "") -> List[Dict[str, Any]]:
+    """Decode a bulk body: YAML documents for a YAML type, else NDJSON lines.
+
+    Every document is checked before any is accepted.
+
+    Raises:
+        ValueError: Listing every document that is not a valid request.
+    """
+    if "yaml" in content_type:
+        try:
+            documents = [doc for doc in yaml.load_all(body, Loader=_YAML_LOADER)
+                         if doc is not None]
+        except yaml.YAMLError as exc:
+            raise ValueError(f"Cannot parse requests: {exc}") from exc
+    else:
+        documents = [line for line in body.splitlines() if line.strip()]
+    requests, errors = [], []
+    for index, document in enumerate(documents):
+        try:
+            if isinstance(document, bytes):
+                document = decode(document, JSON)
+            requests.append(_check(document))
+        except (CodecError, ValueError) as exc:
+            errors.append(f"document {index}: {exc}")
+    if errors:
+        raise ValueError("; ".join(errors))
+    if not requests:
+        raise ValueError("No requests in body")
+    return requests
+
+
+def synthetic_results(request: Dict[str, Any],
+                      profile: ResultProfile) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """Yield ``(delay, message)`` pairs answering *request*.
+
+    *delay* is the time to wait before sending *message*. Batch simulations
+    get one ``in_progress`` and one ``completed`` message; streaming and
+    interactive simulations get ``profile.steps`` ``streaming`` messages
+    with an increasing ``sequence`` followed by ``completed``.
+    """
+    simulation = request["simulation"]
+    sim_type = simulation.get("type", "batch")
+    gap = 1.0 / profile.rate if profile.rate > 0 else 0.0
+    padding = "x" * profile.payload_size
+    started = time.perf_counter()
+
+    def message(status: str, **fields: Any) -> Dict[str, Any]:
+        msg = {
+            "simulation": {"name": simulation.get("file", ""), "type": sim_type},
+            "status": status,
+            "bridge_meta": request.get("bridge_meta") or {},
+            "request_id": simulation.get("request_id", "unknown"),
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "source": simulation.get("simulator", "standin"),
+            "destinations": [simulation.get("client_id", "unknown")],
+            **fields,
+        }
+        if padding:
+            msg["padding"] = padding
+        return msg
+
+    def values(step: int) -> Dict[str, float]:
+        return {f"o{i + 1}": step * 0.001 + i for i in range(profile.payload_fields)}
+
+    if sim_type == "batch":
+        yield profile.latency, message("in_progress", percentage=0)
+        last = values(profile.steps)
+        yield gap, message("completed", outputs=last, metadata={
+            "execution_time": time.perf_counter() - started})
+        return
+
+    for step in range(profile.steps):
+        yield (profile.latency if step == 0 else gap), message(
+            "streaming", sequence=step, data=values(step))
+    yield gap, message("completed", metadata={
+        "execution_time": time.perf_counter() - started})
@@ -0,0 +1,177 @@
+"""Per-request result streams shared by all transports."""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Result statuses after which the bridge sends nothing more for a request
+TERMINAL_STATUSES = ("completed", "error", "timeout")
+
+BLOCK = "block"
+DROP_OLDEST = "drop-oldest"
+COALESCE = "coalesce"
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+_END = object()
+
+
+class ResultStream:
+    """Results of one in-flight simulation.
+
+    Iterate with ``async for`` to receive every message (progress, streaming
+    steps, final result) or ``await stream.result()`` for the final one only;
+    awaiting :meth:`result` on a stream that was never iterated switches it
+    to :meth:`final_only`, so a bounded stream cannot stall its transport.
+    The stream ends after a message whose status is terminal, or with the
+    transport error that interrupted it.
+
+    Transports feed the stream from the event loop thread with :meth:`push`
+    and :meth:`fail`; threads must go through ``loop.call_soon_threadsafe``.
+
+    Args:
+        request_id: Request whose results the stream carries.
+        maxsize: Maximum number of unconsumed messages (0 for unbounded).
+        overflow: What :meth:`push` does with a message that does not fit:
+            ``block`` keeps it, and transports that can pause their reads
+            wait on :meth:`writable` first; ``drop-oldest`` discards the
+            oldest unconsumed message; ``coalesce`` replaces the newest one,
+            so a slow consumer skips to the latest step. Terminal messages
+            and errors are always kept.
+    """
+
+    def __init__(self, request_id: str, maxsize: int = 0, overflow: str = BLOCK):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}' "
+                             f"(expected one of {', '.join(OVERFLOW_POLICIES)})")
+        self.request_id = request_id
+        self.maxsize = max(0, maxsize)
+        self.overflow = overflow
+        self.dropped = 0
+        self._buffer: Deque[Any] = collections.deque()
+        self._loop = asyncio.get_running_loop()
+        self._final: "asyncio.Future[Dict[str, Any]]" = self._loop.create_future()
+        self._readable: Optional[asyncio.Future] = None
+        self._space: Optional[asyncio.Future] = None
+        self._final_only = False
+        self._iterated = False
+        self._done_callbacks: List[Callable[["ResultStream"], None]] = []
+
+    @property
+    def done(self) -> bool:
+        """True once the terminal message or an error has been received."""
+        return self._final.done()
+
+    @property
+    def lag(self) -> int:
+        """Number of received messages not consumed yet."""
+        return len(self._buffer) - (1 if self._buffer and self._buffer[-1] is _END else 0)
+
+    def add_done_callback(self, callback: Callable[["ResultStream"], None]) -> None:
+        """Call *callback(stream)* when the stream ends."""
+        if self.done:
+            callback(self)
+        else:
+            self._done_callbacks.append(callback)
+
+    def final_only(self) -> None:
+        """Keep only the terminal message from now on.
+
+        For callers that only await :meth:`result`: progress messages are
+        discarded on arrival instead of being buffered.
+        """
+        self._final_only = True
+        self._buffer = collections.deque(
+            item for item in self._buffer
+            if not isinstance(item, dict) or item.get("status") in TERMINAL_STATUSES)
+        self._wake_writer()
+
+    async def writable(self) -> None:
+        """Wait until the stream has room, under the ``block`` policy."""
+        while (self.overflow == BLOCK and self.maxsize
+               and self.lag >= self.maxsize and not self.done):
+            if self._space is None:
+                self._space = self._loop.create_future()
+            await self._space
+
+    def push(self, message: Dict[str, Any], overflow: Optional[str] = None) -> None:
+        """Deliver *message*; ends the stream if its status is terminal.
+
+        *overflow* overrides the stream's policy for this message, for
+        transports that must not wait on this stream.
+        """
+        if self.done:
+            return
+        terminal = message.get("status") in TERMINAL_STATUSES
+        if not terminal:
+            if self._final_only:
+                return
+            overflow = overflow or self.overflow
+            if self.maxsize and self.lag >= self.maxsize and overflow != BLOCK:
+                if overflow == DROP_OLDEST:
+                    self._buffer.popleft()
+                else:
+                    self._buffer.pop()
+                self.dropped += 1
+        self._put(message)
+        if terminal:
+            self._final.set_result(message)
+            self._end()
+
+    def fail(self, exc: BaseException) -> None:
+        """End the stream with *exc*."""
+        if self.done:
+            return
+        self._final.set_exception(exc)
+        self._final.exception()  # mark retrieved; consumers get it via iteration
+        self._put(exc)
+        self._end()
+
+    def _put(self, item: Any) -> None:
+        self._buffer.append(item)
+        if self._readable is not None and not self._readable.done():
+            self._readable.set_result(None)
+
+    def _wake_writer(self) -> None:
+        if self._space is not None and not self._space.done():
+            self._space.set_result(None)
+        self._space = None
+
+    def _end(self) -> None:
+        self._put(_END)
+        self._wake_writer()
+        callbacks, self._done_callbacks = self._done_callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def __aiter__(self) -> "ResultStream":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        self._iterated = True
+        while not self._buffer:
+            self._readable = self._loop.create_future()
+            await self._readable
+        item = self._buffer[0]
+        if item is _END:
+            raise StopAsyncIteration
+        self._buffer.popleft()
+        if self.maxsize and self.lag < self.maxsize:
+            self._wake_writer()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    async def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for the terminal message of this simulation.
+
+        Unless the stream is being iterated, progress messages are discarded
+        from now on (see :meth:`final_only`).
+
+        Raises:
+            asyncio.TimeoutError: If *timeout* seconds elapse first.
+        """
+        if not self._iterated:
+            self.final_only()
+        return await asyncio.wait_for(asyncio.shield(self._final), timeout)
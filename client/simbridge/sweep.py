@@ -0,0 +1,249 @@
+"""Parameter sweeps: lazy expansion into simulation requests.
+
+A sweep specification describes how to vary the ``inputs`` of the base
+simulation request. Four modes are supported:
+
+``grid``
+    Cartesian product of per-parameter value lists. A parameter may list its
+    values explicitly or give ``{min, max, steps}`` for evenly spaced values.
+``list``
+    Explicit input combinations given as ``points`` (a list of mappings).
+``random``
+    ``samples`` independent uniform draws from per-parameter ``{min, max}``
+    ranges (or a choice from a value list).
+``lhs``
+    Latin hypercube sampling of ``samples`` points over ``{min, max}`` ranges.
+
+Requests are produced by a generator, so a sweep of millions of points never
+materialises in memory (LHS keeps one stratum permutation per parameter).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import uuid
+from typing import (Any, Awaitable, Callable, Dict, Iterator, List, Optional,
+                    Sequence, TextIO, Union)
+
+from .template import RequestTemplate, TemplateError
+
+MODES = ("grid", "list", "random", "lhs")
+
+
+class SweepError(ValueError):
+    """Raised when a sweep specification is invalid."""
+
+
+def _linspace(low: float, high: float, steps: int) -> List[float]:
+    if steps < 1:
+        raise SweepError("'steps' must be at least 1")
+    if steps == 1:
+        return [low]
+    delta = (high - low) / (steps - 1)
+    return [low + i * delta for i in range(steps)]
+
+
+def _grid_values(name: str, spec: Any) -> Sequence[Any]:
+    if isinstance(spec, list):
+        return spec
+    if isinstance(spec, dict) and {"min", "max", "steps"} <= spec.keys():
+        return _linspace(float(spec["min"]), float(spec["max"]), int(spec["steps"]))
+    if isinstance(spec, dict) and "values" in spec:
+        return spec["values"]
+    raise SweepError(
+        f"Grid parameter '{name}' needs a value list or {{min, max, steps}}")
+
+
+def _check_range(name: str, spec: Any) -> None:
+    if isinstance(spec, list) and spec:
+        return
+    if isinstance(spec, dict) and {"min", "max"} <= spec.keys():
+        if float(spec["min"]) > float(spec["max"]):
+            raise SweepError(f"Parameter '{name}' has min > max")
+        if spec.get("integer", False) and \
+                math.ceil(float(spec["min"])) > math.floor(float(spec["max"])):
+            raise SweepError(f"Integer parameter '{name}' has no integer in [min, max]")
+        return
+    raise SweepError(
+        f"Sampled parameter '{name}' needs {{min, max}} or a value list")
+
+
+def _sample(spec: Any, unit: float) -> Any:
+    """Map *unit* in [0, 1) onto the parameter described by *spec*."""
+    if isinstance(spec, list):
+        return spec[min(int(unit * len(spec)), len(spec) - 1)]
+    low, high = float(spec["min"]), float(spec["max"])
+    if spec.get("integer", False):
+        # Each integer of [min, max] gets an equal share of the unit interval
+        low, high = math.ceil(low), math.floor(high)
+        return min(math.floor(low + unit * (high - low + 1)), high)
+    return low + unit * (high - low)
+
+
+class Sweep:
+    """A validated sweep specification.
+
+    Args:
+        spec: The ``sweep`` mapping (``mode``, ``parameters``/``points``,
+            ``samples``, ``seed``).
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.mode = spec.get("mode", "grid")
+        if self.mode not in MODES:
+            raise SweepError(f"Unknown sweep mode '{self.mode}'; use one of {MODES}")
+        self.parameters: Dict[str, Any] = spec.get("parameters") or {}
+        self.points: List[Dict[str, Any]] = spec.get("points") or []
+        self.samples = int(spec.get("samples", 0))
+        self.seed = spec.get("seed")
+
+        if self.mode == "list":
+            if not all(isinstance(p, dict) for p in self.points) or not self.points:
+                raise SweepError("List sweeps need a non-empty 'points' list of mappings")
+        elif not self.parameters:
+            raise SweepError(f"'{self.mode}' sweeps need 'parameters'")
+        elif self.mode == "grid":
+            self._grid = {name: _grid_values(name, value)
+                          for name, value in self.parameters.items()}
+        else:
+            if self.samples < 1:
+                raise SweepError(f"'{self.mode}' sweeps need 'samples' >= 1")
+            for name, value in self.parameters.items():
+                _check_range(name, value)
+
+    def __len__(self) -> int:
+        if self.mode == "list":
+            return len(self.points)
+        if self.mode == "grid":
+            size = 1
+            for values in self._grid.values():
+                size *= len(values)
+            return size
+        return self.samples
+
+    def points_iter(self) -> Iterator[Dict[str, Any]]:
+        """Yield the input overrides of every point, lazily."""
+        if self.mode == "list":
+            yield from self.points
+        elif self.mode == "grid":
+            names = list(self._grid)
+            for combo in itertools.product(*self._grid.values()):
+                yield dict(zip(names, combo))
+        elif self.mode == "random":
+            rng = random.Random(self.seed)
+            for _ in range(self.samples):
+                yield {name: _sample(spec, rng.random())
+                       for name, spec in self.parameters.items()}
+        else:
+            yield from self._latin_hypercube()
+
+    def _latin_hypercube(self) -> Iterator[Dict[str, Any]]:
+        rng = random.Random(self.seed)
+        strata = {}
+        for name in self.parameters:
+            order = list(range(self.samples))
+            rng.shuffle(order)
+            strata[name] = order
+        for i in range(self.samples):
+            yield {name: _sample(spec, (strata[name][i] + rng.random()) / self.samples)
+                   for name, spec in self.parameters.items()}
+
+    def requests(self, base: Union[Dict[str, Any], RequestTemplate],
+                 sweep_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield one full request per point, derived from *base*.
+
+        Each request gets ``request_id`` ``<sweep_id>-<index>`` and a fresh
+        timestamp; its ``inputs`` are the base inputs updated with the point.
+        Requests are built from the compiled template, so they can be encoded
+        with :meth:`RequestTemplate.encode`.
+        """
+        if not isinstance(base, RequestTemplate):
+            try:
+                base = RequestTemplate(base)
+            except TemplateError as err:
+                raise SweepError(f"Invalid base request: {err}") from err
+        sweep_id = sweep_id or uuid.uuid4().hex[:8]
+        for index, point in enumerate(self.points_iter()):
+            yield base.build(f"{sweep_id}-{index:06d}", inputs=point)
+
+
+class ResultsWriter:
+    """Append sweep results to an NDJSON file, one indexed record per request.
+
+    Each line holds ``index``, ``request_id``, ``inputs``, ``status`` and the
+    final ``result`` (or ``error``), so the file can be loaded or resumed
+    without keeping the whole campaign in memory.
+    """
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+
+    def write(self, index: int, request: Dict[str, Any],
+              result: Optional[Dict[str, Any]] = None,
+              error: Optional[BaseException] = None) -> None:
+        """Write the record for request number *index*."""
+        simulation = request["simulation"]
+        record: Dict[str, Any] = {
+            "index": index,
+            "request_id": simulation["request_id"],
+            "inputs": simulation.get("inputs", {}),
+        }
+        if error is not None:
+            record["status"] = "error"
+            record["error"] = f"{type(error).__name__}: {error}"
+        else:
+            record["status"] = (result or {}).get("status", "unknown")
+            record["result"] = result
+        self._stream.write(json.dumps(record, default=str) + "\n")
+        self._stream.flush()
+
+
+async def run_window(requests: Iterator[Dict[str, Any]],
+                     submit: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                     window: int,
+                     on_done: Callable[[int, Dict[str, Any], Optional[Dict[str, Any]],
+                                        Optional[BaseException]], None]) -> int:
+    """Submit *requests* keeping at most *window* of them in flight.
+
+    The iterator is consumed only as slots free up, so memory stays bounded
+    by the window, not the sweep size.
+
+    Args:
+        requests: Lazily produced requests.
+        submit: Coroutine function returning the final result of a request.
+        window: Maximum number of in-flight requests.
+        on_done: Called with ``(index, request, result, error)`` as each
+            request finishes, in completion order.
+
+    Returns:
+        int: Number of requests that failed.
+    """
+    if window < 1:
+        raise SweepError("'window' must be at least 1")
+    failures = 0
+    pending: Dict[asyncio.Task, tuple] = {}
+
+    def collect(done) -> None:
+        nonlocal failures
+        for task in done:
+            index, request = pending.pop(task)
+            error = task.exception()
+            if error is not None:
+                failures += 1
+                on_done(index, request, None, error)
+            else:
+                on_done(index, request, task.result(), None)
+
+    for index, request in enumerate(requests):
+        if len(pending) >= window:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(done)
+        pending[asyncio.ensure_future(submit(request))] = (index, request)
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        collect(done)
+    return failures
@@ -0,0 +1,185 @@
+"""Pre-compiled simulation request templates.
+
+A :class:`RequestTemplate` parses and validates the request envelope (usually
+``simulation.yaml``) once and pre-serialises every field to a JSON fragment.
+Requests derived from it with :meth:`RequestTemplate.build` share the
+template's field values, so :meth:`RequestTemplate.encode` only serialises the
+fields that changed (``request_id``, ``timestamp``, ``client_id`` and the
+varied ``inputs``) and splices them between the cached fragments::
+
+    template = RequestTemplate.from_file("simulation.yaml")
+    request = template.build(inputs={"i1": 0.5})
+    body = template.encode(request)          # bytes, ready to publish
+
+JSON is also valid YAML, so the same body is accepted by every adapter of
+the bridge.
+
+The routing envelope of a request (``request_id``, ``client_id``,
+``simulator``, ``type`` and ``bridge_meta``) is also exposed as flat string
+headers by :func:`routing_headers`. Transports attach them as AMQP headers
+or MQTT v5 user properties, so a broker or bridge can route on them without
+parsing the body.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import yaml
+
+SIMULATION_TYPES = ("batch", "streaming", "interactive")
+REQUIRED_FIELDS = ("simulator", "type", "file")
+ROUTING_FIELDS = ("request_id", "client_id", "simulator", "type")
+
+_last_timestamp = (0, "")
+_dumps = json.JSONEncoder(default=str).encode
+
+
+class TemplateError(ValueError):
+    """Raised when a request envelope is not a valid simulation request."""
+
+
+def utc_timestamp() -> str:
+    """Return the current UTC time in ISO 8601, formatted once per second."""
+    global _last_timestamp  # pylint: disable=global-statement
+    now = int(time.time())
+    if _last_timestamp[0] != now:
+        _last_timestamp = (now, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)))
+    return _last_timestamp[1]
+
+
+def routing_headers(request: Dict[str, Any]) -> Dict[str, str]:
+    """Return the routing envelope of *request* as string headers.
+
+    ``bridge_meta``, when present, is carried JSON-encoded.
+    """
+    simulation = request.get("simulation") or {}
+    headers = {field: str(simulation[field])
+               for field in ROUTING_FIELDS if simulation.get(field) is not None}
+    if request.get("bridge_meta") is not None:
+        headers["bridge_meta"] = _dumps(request["bridge_meta"])
+    return headers
+
+
+def _fragments(mapping: Dict[str, Any]) -> Dict[str, str]:
+    return {key: f"{_dumps(key)}: {_dumps(value)}" for key, value in mapping.items()}
+
+
+def _encode(mapping: Dict[str, Any], base: Dict[str, Any],
+            fragments: Dict[str, str]) -> str:
+    """Serialise *mapping*, reusing the fragment of each value shared with *base*."""
+    parts = []
+    for key, value in mapping.items():
+        if key in fragments and value is base[key]:
+            parts.append(fragments[key])
+        else:
+            parts.append(f"{_dumps(key)}: {_dumps(value)}")
+    return "{" + ", ".join(parts) + "}"
+
+
+class RequestTemplate:
+    """A validated request envelope with pre-serialised static fields.
+
+    Args:
+        request: Request mapping with a ``simulation`` block.
+
+    Raises:
+        TemplateError: If the envelope is invalid.
+    """
+
+    def __init__(self, request: Dict[str, Any]):
+        self.request = self.validate(request)
+        self.simulation: Dict[str, Any] = self.request["simulation"]
+        self.inputs: Dict[str, Any] = self.simulation.get("inputs") or {}
+        self._top = _fragments(self.request)
+        self._fields = _fragments(self.simulation)
+        self._inputs = _fragments(self.inputs)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RequestTemplate":
+        """Load and compile the YAML request envelope at *path*.
+
+        Raises:
+            FileNotFoundError: If *path* does not exist.
+            TemplateError: If the file is not a valid request envelope.
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            try:
+                request = yaml.safe_load(file)
+            except yaml.YAMLError as err:
+                raise TemplateError(f"{path}: {err}") from err
+        return cls(request)
+
+    @staticmethod
+    def validate(request: Any) -> Dict[str, Any]:
+        """Check the envelope of *request* and return it.
+
+        Raises:
+            TemplateError: If *request* has no ``simulation`` block, misses a
+                required field, or has an unknown simulation type.
+        """
+        if not isinstance(request, dict) or not isinstance(request.get("simulation"), dict):
+            raise TemplateError("Request has no 'simulation' block")
+        simulation = request["simulation"]
+        missing = [field for field in REQUIRED_FIELDS if not simulation.get(field)]
+        if missing:
+            raise TemplateError(f"Missing simulation field(s): {', '.join(missing)}")
+        if simulation["type"] not in SIMULATION_TYPES:
+            raise TemplateError(
+                f"Unknown simulation type '{simulation['type']}' "
+                f"(expected one of {', '.join(SIMULATION_TYPES)})")
+        for block in ("inputs", "outputs"):
+            if simulation.get(block) is not None and not isinstance(simulation[block], dict):
+                raise TemplateError(f"'{block}' must be a mapping")
+        return request
+
+    def build(self, request_id: Optional[str] = None,
+              inputs: Optional[Dict[str, Any]] = None,
+              **fields: Any) -> Dict[str, Any]:
+        """Return a new request derived from the template.
+
+        Args:
+            request_id: Request id; a random one is generated when omitted.
+            inputs: Input values overriding the template's ``inputs``.
+            **fields: Other ``simulation`` fields to override (``client_id``, ...).
+
+        The result shares unchanged values with the template; treat it as
+        read-only or copy it before mutating nested values.
+        """
+        simulation = dict(self.simulation)
+        simulation["request_id"] = request_id or uuid.uuid4().hex
+        simulation["timestamp"] = utc_timestamp()
+        simulation.update(fields)
+        if inputs:
+            simulation["inputs"] = {**self.inputs, **inputs}
+        return {**self.request, "simulation": simulation}
+
+    def encode(self, request: Dict[str, Any]) -> bytes:
+        """Serialise *request* to JSON bytes.
+
+        Values identical to the template's are emitted from the pre-serialised
+        fragments, so only the fields changed since :meth:`build` cost any
+        encoding work. Any request mapping is accepted; the output is the
+        same as ``json.dumps(request)``.
+        """
+        simulation = request["simulation"]
+        parts = []
+        for key, value in simulation.items():
+            if key in self._fields and value is self.simulation[key]:
+                parts.append(self._fields[key])
+            elif key == "inputs" and isinstance(value, dict):
+                parts.append(f'"inputs": {_encode(value, self.inputs, self._inputs)}')
+            else:
+                parts.append(f"{_dumps(key)}: {_dumps(value)}")
+        body = []
+        for key, value in request.items():
+            if key == "simulation":
+                body.append('"simulation": {' + ", ".join(parts) + "}")
+            elif key in self._top and value is self.request[key]:
+                body.append(self._top[key])
+            else:
+                body.append(f"{_dumps(key)}: {_dumps(value)}")
+        return ("{" + ", ".join(body) + "}").encode("utf-8")
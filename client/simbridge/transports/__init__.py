@@ -0,0 +1,36 @@
+"""Pluggable transports of the simulation client SDK.
+
+Transports are imported lazily so that only the dependencies of the
+transport actually used (httpx, paho-mqtt or pika) need to be installed.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Any, Dict
+
+from .base import Transport, TransportError
+
+TRANSPORTS = {
+    "rest": ("simbridge.transports.rest", "RESTTransport"),
+    "mqtt": ("simbridge.transports.mqtt", "MQTTTransport"),
+    "rabbitmq": ("simbridge.transports.rabbitmq", "RabbitMQTransport"),
+}
+
+
+def create_transport(name: str, config: Dict[str, Any], **kwargs: Any) -> Transport:
+    """Instantiate the transport registered as *name*.
+
+    Raises:
+        ValueError: If *name* is not a known transport.
+    """
+    try:
+        module_name, class_name = TRANSPORTS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown transport '{name}'; use one of {sorted(TRANSPORTS)}") from None
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls(config, **kwargs)
+
+
+__all__ = ["TRANSPORTS", "Transport", "TransportError", "create_transport"]
@@ -0,0 +1,53 @@
+"""Transport interface of the simulation client SDK."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from ..streams import ResultStream
+
+
+class TransportError(ConnectionError):
+    """Raised when a transport cannot deliver a request or its results."""
+
+
+class Transport(ABC):
+    """One connection (or connection pool) to the bridge.
+
+    A transport is created from the configuration mapping of the matching
+    example client (``rest_use.yaml``, ``mqtt_use.yaml`` or
+    ``rabbitmq_use.yaml``), connected once, and then multiplexes any number
+    of requests. All methods run on the event loop thread.
+    """
+
+    name = "base"
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Open the connection(s) to the bridge."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close the connection(s) and fail the streams still open."""
+
+    def prepare(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Return *request* as it should be sent over this transport."""
+        return request
+
+    @abstractmethod
+    async def send(self, request: Dict[str, Any], stream: ResultStream,
+                   body: Optional[bytes] = None) -> None:
+        """Submit *request* and feed its results into *stream*.
+
+        *body* is *request* already encoded as JSON, if the caller has it.
+
+        Returns once the request has been handed to the bridge (or broker);
+        results keep arriving in the background.
+
+        Raises:
+            TransportError: If the request could not be submitted.
+        """
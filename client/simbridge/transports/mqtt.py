@@ -0,0 +1,203 @@
+"""MQTT transport: one broker connection, results demultiplexed by request_id."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import ssl
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from ..codec import CodecError, decode, peek_request_ids
+from ..events import EventBus
+from ..streams import ResultStream
+from ..template import routing_headers
+from .base import Transport, TransportError
+
+
+def _correlated_request_id(properties: Any) -> Optional[str]:
+    """Return the request id an MQTT v5 message names in its properties, if any."""
+    if properties is None:
+        return None
+    correlation = getattr(properties, "CorrelationData", None)
+    if correlation:
+        return correlation.decode("utf-8", errors="replace")
+    for key, value in getattr(properties, "UserProperty", None) or ():
+        if key == "request_id":
+            return value
+    return None
+
+
+class MQTTTransport(Transport):
+    """Publish requests on the input topic and route output-topic messages.
+
+    paho's network loop runs on its own thread. It only peeks at the
+    ``request_id`` of each received message and queues it for one of
+    ``workers`` decoder threads of an :class:`~simbridge.events.EventBus`
+    (chosen by ``request_id``, so each request's messages stay in order),
+    which hand the results to the event loop with ``call_soon_threadsafe``.
+    With ``workers: 0`` messages are decoded on the network thread.
+    ``max_inflight`` bounds the QoS 1/2 publishes awaiting acknowledgement.
+    Configured with the ``mqtt`` section of ``mqtt_use.yaml``.
+
+    With ``protocol: 5`` each request also carries its routing envelope as
+    user properties, its ``request_id`` as ``CorrelationData``, the
+    ``response_topic`` to answer on, and a message expiry equal to its
+    ``simulation.timeout``. Results with ``CorrelationData`` (or a
+    ``request_id`` user property) are routed without looking at their body.
+    Topic aliases are not advertised: paho does not resolve inbound ones.
+    """
+
+    name = "mqtt"
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.cfg = config["mqtt"]
+        self.v5 = int(self.cfg.get("protocol", 4)) == 5
+        self.response_topic = self.cfg.get("response_topic")
+        self.client = mqtt.Client(client_id=f"sim-client-{uuid.uuid4().hex[:12]}",
+                                  protocol=mqtt.MQTTv5 if self.v5 else mqtt.MQTTv311)
+        self.client.username_pw_set(self.cfg["username"], self.cfg["password"])
+        if self.cfg.get("tls", False):
+            self.client.tls_set(cert_reqs=ssl.CERT_REQUIRED,
+                                tls_version=ssl.PROTOCOL_TLS_CLIENT)
+            self.client.tls_insecure_set(False)
+        self.client.max_inflight_messages_set(int(self.cfg.get("max_inflight", 20)))
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+        self.workers = int(self.cfg.get("workers", 1))
+        self.queue_size = int(self.cfg.get("queue_size", 1024))
+        self._loop: asyncio.AbstractEventLoop = None
+        self._connected: asyncio.Future = None
+        self._streams: Dict[str, ResultStream] = {}
+        self._bus: Optional[EventBus] = None
+        self._decoders: List[Callable[..., None]] = []
+
+    async def connect(self) -> None:
+        """Connect to the broker and wait for its CONNACK.
+
+        Raises:
+            TransportError: If the broker cannot be reached, refuses the
+                connection, or does not answer within ``connect_timeout``.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._connected = self._loop.create_future()
+        try:
+            await self._loop.run_in_executor(None, functools.partial(
+                self.client.connect, self.cfg["host"], self.cfg["port"],
+                self.cfg.get("keepalive", 60)))
+        except (OSError, ValueError) as exc:
+            raise TransportError(f"MQTT connection failed: {exc}") from exc
+        if self.workers > 0:
+            names = [f"mqtt-decode-{index}" for index in range(self.workers)]
+            self._bus = EventBus({name: self._decode for name in names}, self.queue_size)
+            self._decoders = [self._bus.publisher(name) for name in names]
+        self.client.loop_start()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._connected),
+                                   float(self.cfg.get("connect_timeout", 10)))
+        except BaseException as exc:
+            self.client.disconnect()
+            await self._loop.run_in_executor(None, self._stop)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise TransportError("MQTT connection timed out waiting for CONNACK") from None
+            raise
+
+    def _stop(self) -> None:
+        """Stop the network loop and the decoder threads (blocking)."""
+        self.client.loop_stop()
+        if self._bus is not None:
+            self._bus.close()
+            self._bus = None
+            self._decoders = []
+
+    async def close(self) -> None:
+        if self._loop is not None:
+            self.client.disconnect()
+            await self._loop.run_in_executor(None, self._stop)
+        for stream in list(self._streams.values()):
+            stream.fail(TransportError("MQTT transport closed"))
+        self._streams.clear()
+
+    async def send(self, request: Dict[str, Any], stream: ResultStream,
+                   body: Optional[bytes] = None) -> None:
+        self._streams[stream.request_id] = stream
+        stream.add_done_callback(lambda s: self._streams.pop(s.request_id, None))
+        properties = None
+        if self.v5:
+            properties = Properties(PacketTypes.PUBLISH)
+            properties.ContentType = "application/json"
+            properties.UserProperty = list(routing_headers(request).items())
+            properties.CorrelationData = stream.request_id.encode("utf-8")
+            if self.response_topic:
+                properties.ResponseTopic = self.response_topic
+            timeout = request["simulation"].get("timeout")
+            if isinstance(timeout, (int, float)) and timeout > 0:
+                properties.MessageExpiryInterval = int(timeout)
+        info = self.client.publish(self.cfg["input_topic"],
+                                   body or json.dumps(request, default=str),
+                                   qos=self.cfg.get("qos", 0), properties=properties)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            raise TransportError(f"MQTT publish failed: {mqtt.error_string(info.rc)}")
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):  # pylint: disable=unused-argument,too-many-arguments
+        if rc == 0:
+            client.subscribe(self.cfg["output_topic"], qos=self.cfg.get("qos", 0))
+            if self.response_topic and self.response_topic != self.cfg["output_topic"]:
+                client.subscribe(self.response_topic, qos=self.cfg.get("qos", 0))
+            self._loop.call_soon_threadsafe(self._resolve_connect, None)
+        else:
+            reason = str(rc) if self.v5 else mqtt.connack_string(rc)
+            self._loop.call_soon_threadsafe(self._resolve_connect, TransportError(
+                f"MQTT connection refused: {reason}"))
+
+    def _resolve_connect(self, exc):
+        if self._connected.done():
+            return
+        if exc is None:
+            self._connected.set_result(True)
+        else:
+            self._connected.set_exception(exc)
+
+    def _on_message(self, client, userdata, msg):  # pylint: disable=unused-argument
+        properties = getattr(msg, "properties", None)
+        request_id = _correlated_request_id(properties)
+        if request_id is not None:
+            request_ids: Optional[Set[str]] = {request_id}
+        else:
+            request_ids = peek_request_ids(msg.payload, getattr(properties, "ContentType", None))
+        if not self._wanted(request_ids):
+            return
+        if not self._decoders:
+            self._decode((msg, request_id))
+            return
+        index = hash(min(request_ids)) % len(self._decoders) if request_ids else 0
+        self._decoders[index]((msg, request_id))
+
+    def _decode(self, event: Tuple[Any, Optional[str]]) -> None:
+        msg, request_id = event
+        content_type = getattr(getattr(msg, "properties", None), "ContentType", None)
+        try:
+            message = decode(msg.payload, content_type)
+        except CodecError:
+            return
+        if not isinstance(message, dict):
+            return
+        if request_id is not None:
+            message.setdefault("request_id", request_id)
+        if message.get("request_id") in self._streams:
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _wanted(self, request_ids: Optional[Set[str]]) -> bool:
+        """Whether a result with *request_ids* may belong to one of our streams."""
+        return request_ids is None or any(rid in self._streams for rid in request_ids)
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        stream = self._streams.get(message.get("request_id"))
+        if stream is not None:
+            stream.push(message)
@@ -0,0 +1,218 @@
+"""REST transport: NDJSON streams over one pooled HTTP/2 client."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+import jwt
+
+from ..codec import CODECS, JSON, CodecError, codec_for
+from ..streams import BLOCK, COALESCE, TERMINAL_STATUSES, ResultStream
+from .base import Transport, TransportError
+
+
+def build_token(cfg: Dict[str, Any]) -> str:
+    """Return an HS256-signed JWT for the ``rest_use.yaml`` settings *cfg*.
+
+    Raises:
+        ValueError: If the secret is shorter than 256 bits.
+    """
+    secret = cfg.get("secret", "")
+    if len(secret) < 32:
+        raise ValueError("HS256 requires JWT secret ≥ 32 characters (256 bits).")
+    now = int(time.time())
+    payload = {
+        "sub": cfg.get("subject", "client-123"),
+        "iss": cfg.get("issuer", "simulation-bridge"),
+        "iat": now,
+        "exp": now + int(cfg.get("ttl", 900)),
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+class RESTTransport(Transport):
+    """Submit each request as a POST whose response streams its results.
+
+    All requests share one ``httpx.AsyncClient`` with HTTP/2 enabled, so
+    concurrent streams are multiplexed over a single connection when the
+    bridge negotiates h2.
+
+    The bridge's REST adapter keeps one open stream per ``client_id``; unless
+    ``unique_client_ids`` is disabled, the transport therefore suffixes the
+    ``client_id`` of each request with its ``request_id``.
+
+    With ``bulk.enabled``, requests submitted within ``bulk.linger`` seconds
+    of each other are gathered, up to ``bulk.max_requests``, into one NDJSON
+    POST to ``bulk.url``. The response is one stream of results tagged by
+    ``request_id``, which the transport routes to each request's stream. The
+    response is shared, so it is never paused for one stream: a full stream
+    under the ``block`` policy is coalesced instead.
+    """
+
+    name = "rest"
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.url = config["url"]
+        self.timeout = int(config.get("timeout", 600))
+        self.ssl_verify = config.get("ssl_verify", False)
+        self.max_connections = int(config.get("max_connections", 64))
+        self.unique_client_ids = config.get("unique_client_ids", True)
+        self.token = build_token(config)
+        bulk = config.get("bulk") or {}
+        self.bulk_url = bulk.get("url") if bulk.get("enabled", False) else None
+        self.bulk_max_requests = max(1, int(bulk.get("max_requests", 100)))
+        self.bulk_linger = float(bulk.get("linger", 0.01))
+        self.client: Optional[httpx.AsyncClient] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._batch: List[Tuple[bytes, ResultStream]] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+
+    async def connect(self) -> None:
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        self.client = httpx.AsyncClient(http2=True, timeout=self.timeout,
+                                        verify=self.ssl_verify, limits=limits)
+
+    async def close(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+        for _body, stream in self._batch:
+            stream.fail(TransportError("REST transport closed"))
+        self._batch = []
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _headers(self, content_type: str = "application/json") -> Dict[str, str]:
+        return {
+            "Content-Type": content_type,
+            "Accept": "application/x-ndjson",
+            "Authorization": f"Bearer {self.token}",
+        }
+
+    def prepare(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.unique_client_ids:
+            return request
+        simulation = request["simulation"]
+        return {**request, "simulation": {
+            **simulation,
+            "client_id": f"{simulation.get('client_id', 'client')}-{simulation['request_id']}",
+        }}
+
+    async def send(self, request: Dict[str, Any], stream: ResultStream,
+                   body: Optional[bytes] = None) -> None:
+        if body is None:
+            body = json.dumps(request, default=str).encode("utf-8")
+        if self.bulk_url is not None:
+            self._batch.append((body, stream))
+            if len(self._batch) >= self.bulk_max_requests:
+                self._flush_batch()
+            elif self._batch_timer is None:
+                self._batch_timer = asyncio.get_running_loop().call_later(
+                    self.bulk_linger, self._flush_batch)
+            return
+        task = asyncio.ensure_future(self._stream(body, stream))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        stream.add_done_callback(functools.partial(self._abandon, task))
+
+    def _flush_batch(self) -> None:
+        """Submit the gathered requests as one bulk POST."""
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        streams = {stream.request_id: stream for _body, stream in batch if not stream.done}
+        if not streams:
+            return
+        body = b"\n".join(body for body, stream in batch if not stream.done) + b"\n"
+        task = asyncio.ensure_future(self._stream_bulk(body, streams))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _abandon(task: asyncio.Task, _stream: ResultStream) -> None:
+        """Close the HTTP stream of a request whose result stream was ended by the caller."""
+        if task is not asyncio.current_task():
+            task.cancel()
+
+    async def _stream(self, body: bytes, stream: ResultStream) -> None:
+        try:
+            async with self.client.stream("POST", self.url, headers=self._headers(),
+                                          content=body) as resp:
+                if resp.status_code >= 400:
+                    detail = (await resp.aread()).decode("utf-8", errors="replace")
+                    raise TransportError(
+                        f"{resp.status_code} {resp.reason_phrase}: {detail}")
+                codec = codec_for(resp.headers.get("content-type")) or CODECS[JSON]
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        item = codec.decode(line)
+                    except CodecError:
+                        continue
+                    if isinstance(item, dict):
+                        item.setdefault("request_id", stream.request_id)
+                        if item.get("status") not in TERMINAL_STATUSES:
+                            await stream.writable()
+                        stream.push(item)
+                        if stream.done:
+                            return
+            stream.fail(TransportError("Stream closed without a final result"))
+        except httpx.HTTPError as exc:
+            stream.fail(TransportError(f"Network error contacting {self.url}: {exc}"))
+        except TransportError as exc:
+            stream.fail(exc)
+        except asyncio.CancelledError:
+            stream.fail(TransportError("REST transport closed"))
+            raise
+
+    async def _stream_bulk(self, body: bytes, streams: Dict[str, ResultStream]) -> None:
+        pending = dict(streams)
+        for stream in streams.values():
+            stream.add_done_callback(lambda s: pending.pop(s.request_id, None))
+        try:
+            async with self.client.stream("POST", self.bulk_url,
+                                          headers=self._headers("application/x-ndjson"),
+                                          content=body) as resp:
+                if resp.status_code >= 400:
+                    detail = (await resp.aread()).decode("utf-8", errors="replace")
+                    raise TransportError(
+                        f"{resp.status_code} {resp.reason_phrase}: {detail}")
+                codec = codec_for(resp.headers.get("content-type")) or CODECS[JSON]
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        item = codec.decode(line)
+                    except CodecError:
+                        continue
+                    stream = pending.get(item.get("request_id")) if isinstance(item, dict) else None
+                    if stream is None:
+                        continue
+                    # One slow consumer must not stall the other requests of the batch
+                    stream.push(item, COALESCE if stream.overflow == BLOCK else None)
+                    if not pending:
+                        return
+            error = TransportError("Bulk stream closed without a final result")
+        except httpx.HTTPError as exc:
+            error = TransportError(f"Network error contacting {self.bulk_url}: {exc}")
+        except TransportError as exc:
+            error = exc
+        except asyncio.CancelledError:
+            error = TransportError("REST transport closed")
+            for stream in list(pending.values()):
+                stream.fail(error)
+            raise
+        for stream in list(pending.values()):
+            stream.fail(error)
@@ -0,0 +1,134 @@
+"""Offline stand-in bridge for benchmarking the example clients.
+
+Serves the REST adapter's NDJSON contract and an embedded MQTT broker that
+answers requests with synthetic batch, streaming or interactive results at
+the rate and payload size configured in ``standin_use.yaml``. The RabbitMQ
+client uses the in-process fake instead (``rabbitmq_client.py --standin``).
+
+With ``rest.workers`` above 1, the REST stand-in runs in that many processes
+sharing the port through ``SO_REUSEPORT``, so it is not capped by one core.
+Each worker answers the requests of the connections it accepted.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import signal
+import sys
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from simbridge.standin import ResultProfile  # noqa: E402  pylint: disable=wrong-import-position
+from simbridge.standin.mqtt import MQTTBrokerShim  # noqa: E402  pylint: disable=wrong-import-position
+from simbridge.standin.rest import RESTStandIn  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def load_config(config_path="standin_use.yaml"):
+    """Load YAML configuration file."""
+    try:
+        with open(config_path, "r", encoding="utf-8") as file:
+            return yaml.safe_load(file)
+    except FileNotFoundError:
+        print(f"Error: Configuration file '{config_path}' not found.")
+        sys.exit(1)
+    except yaml.YAMLError as err:
+        print(f"Error parsing YAML file: {err}")
+        sys.exit(1)
+
+
+def make_rest(config, profile):
+    """Build the REST stand-in described by the ``rest`` section."""
+    rest_cfg = config.get("rest") or {}
+    verifier = None
+    if (rest_cfg.get("auth") or {}).get("secret"):
+        from simbridge.standin.auth import TokenVerifier  # pylint: disable=import-outside-toplevel
+        verifier = TokenVerifier.from_config(rest_cfg["auth"])
+    return RESTStandIn(profile, rest_cfg.get("host", "127.0.0.1"),
+                       rest_cfg.get("port", 5000),
+                       rest_cfg.get("endpoint", "/message"),
+                       rest_cfg.get("bulk_endpoint"), verifier,
+                       reuse_port=int(rest_cfg.get("workers", 1)) > 1)
+
+
+async def serve_rest(config):
+    """Serve only the REST stand-in until cancelled (extra worker processes)."""
+    rest = make_rest(config, ResultProfile.from_config(config.get("results") or {}))
+    await rest.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await rest.stop()
+
+
+def rest_worker(config):
+    """Entry point of an extra REST worker process."""
+    try:
+        asyncio.run(serve_rest(config))
+    except KeyboardInterrupt:
+        pass
+
+
+async def serve(config):
+    """Start the enabled stand-ins and run until cancelled."""
+    profile = ResultProfile.from_config(config.get("results") or {})
+    servers = []
+    workers = []
+
+    rest_cfg = config.get("rest") or {}
+    if rest_cfg.get("enabled", True):
+        rest = make_rest(config, profile)
+        await rest.start()
+        servers.append(rest)
+        for _ in range(int(rest_cfg.get("workers", 1)) - 1):
+            worker = multiprocessing.Process(target=rest_worker, args=(config,), daemon=True)
+            worker.start()
+            workers.append(worker)
+        print(f"REST stand-in on http://{rest.host}:{rest.port}{rest.endpoint} "
+              f"(bulk: {rest.bulk_endpoint}, {len(workers) + 1} process(es))")
+
+    mqtt_cfg = config.get("mqtt") or {}
+    if mqtt_cfg.get("enabled", True):
+        broker = MQTTBrokerShim(profile, mqtt_cfg.get("host", "127.0.0.1"),
+                                mqtt_cfg.get("port", 1883),
+                                mqtt_cfg.get("input_topic", "bridge/input"),
+                                mqtt_cfg.get("output_topic", "bridge/output"))
+        await broker.start()
+        servers.append(broker)
+        print(f"MQTT stand-in broker on {broker.host}:{broker.port} "
+              f"({broker.input_topic} -> {broker.output_topic})")
+
+    print("(CTRL+C to terminate)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for server in servers:
+            await server.stop()
+            print(f"{type(server).__name__}: {server.requests} requests served")
+
+
+def parse_args():
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-c", "--config", default="standin_use.yaml",
+                        help="stand-in configuration file")
+    return parser.parse_args()
+
+
+def main():
+    """Main program entry point."""
+    config = load_config(parse_args().config)
+    # Shut down like on CTRL+C, so the REST worker processes are stopped too
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(serve(config))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Sweep client for simulation bridge.
+
+Expands the sweep described in ``sweep_use.yaml`` lazily into simulation
+requests and submits them over REST, MQTT or RabbitMQ with a bounded number
+of requests in flight. Final results stream into an indexed NDJSON file.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from simbridge import HedgedClient, SimulationClient  # noqa: E402  pylint: disable=wrong-import-position
+from simbridge.cache import MODES as CACHE_MODES, ResultCache  # noqa: E402  pylint: disable=wrong-import-position
+from simbridge.sweep import ResultsWriter, Sweep, SweepError, run_window  # noqa: E402  pylint: disable=wrong-import-position
+from simbridge.template import RequestTemplate, TemplateError  # noqa: E402  pylint: disable=wrong-import-position
+from simbridge.transports import TRANSPORTS  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def load_config(config_path="sweep_use.yaml"):
+    """Load YAML configuration file."""
+    try:
+        with open(config_path, "r", encoding="utf-8") as file:
+            return yaml.safe_load(file)
+    except FileNotFoundError:
+        print(f"Error: Configuration file '{config_path}' not found.")
+        sys.exit(1)
+    except yaml.YAMLError as err:
+        print(f"Error parsing YAML file: {err}")
+        sys.exit(1)
+
+
+def make_client(config, transport, window):
+    """Build the sweep's client, hedged over a second transport if enabled."""
+    client = SimulationClient(
+        transport, load_config(config["transport_config"][transport]), window)
+    hedge_cfg = config.get("hedge") or {}
+    if not hedge_cfg.get("enabled", False):
+        return client
+    hedge_transport = hedge_cfg.get("transport", "mqtt")
+    if hedge_transport not in TRANSPORTS or hedge_transport == transport:
+        print(f"Error: invalid hedge transport '{hedge_transport}'")
+        sys.exit(1)
+    secondary = SimulationClient(
+        hedge_transport, load_config(config["transport_config"][hedge_transport]), window)
+    return HedgedClient(client, secondary, float(hedge_cfg.get("budget", 2.0)),
+                        hedge_cfg.get("failover", True))
+
+
+def cached(submit, cache):
+    """Wrap *submit* so results are served from and stored in *cache*."""
+    async def submit_cached(request):
+        simulation = request["simulation"]
+        hit = cache.get(simulation)
+        if hit is not None:
+            return {**hit, "request_id": simulation["request_id"], "cached": True}
+        result = await submit(request)
+        cache.put(simulation, result)
+        return result
+    return submit_cached
+
+
+async def run_sweep(config):
+    """Expand the configured sweep and submit it; return the failure count."""
+    transport = config.get("transport", "rest")
+    if transport not in TRANSPORTS:
+        print(f"Error: unknown transport '{transport}'")
+        sys.exit(1)
+    window = int(config.get("window", 16))
+    timeout = float(config.get("timeout", 600))
+
+    try:
+        template = RequestTemplate.from_file(config["payload_file"])
+    except (OSError, TemplateError) as err:
+        print(f"Error loading {config['payload_file']}: {err}")
+        sys.exit(1)
+    try:
+        sweep = Sweep(config.get("sweep") or {})
+        requests = sweep.requests(template, config.get("sweep_id"))
+    except SweepError as err:
+        print(f"Error in sweep specification: {err}")
+        sys.exit(1)
+
+    print(f"Sweep: {len(sweep)} requests over {transport}, window {window}")
+    start = time.perf_counter()
+    done = 0
+
+    with open(config.get("results_file", "sweep_results.ndjson"), "a",
+              encoding="utf-8") as results:
+        writer = ResultsWriter(results)
+
+        def on_done(index, request, result, error):
+            nonlocal done
+            done += 1
+            writer.write(index, request, result, error)
+            if error is not None:
+                print(f"[{done}/{len(sweep)}] #{index} failed: {error!r}")
+
+        cache_cfg = config.get("cache") or {}
+        cache = None
+        if cache_cfg.get("mode", "bypass") != "bypass":
+            cache = ResultCache.from_config(cache_cfg)
+        try:
+            async with make_client(config, transport, window) as client:
+                async def submit(request):
+                    return await client.run(request, timeout, template)
+                if cache is not None:
+                    submit = cached(submit, cache)
+                failures = await run_window(requests, submit, window, on_done)
+                if isinstance(client, HedgedClient):
+                    print(f"Hedged: {client.hedged} requests, "
+                          f"{client.secondary_wins} answered by {client.secondary.transport.name}")
+        finally:
+            if cache is not None:
+                cache.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {done - failures} ok, {failures} failed in {elapsed:.1f}s")
+    if cache is not None and cache.mode == "read-through":
+        print(f"Cache: {cache.hits} hits, {cache.misses} misses")
+    return failures
+
+
+def parse_args():
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-c", "--config", default="sweep_use.yaml",
+                        help="sweep configuration file")
+    parser.add_argument("--cache", choices=CACHE_MODES,
+                        help="result cache mode (overrides cache.mode)")
+    return parser.parse_args()
+
+
+def main():
+    """Main program entry point."""
+    args = parse_args()
+    config = load_config(args.config)
+    if args.cache:
+        config.setdefault("cache", {})["mode"] = args.cache
+    os.chdir(os.path.dirname(os.path.abspath(args.config)))
+    try:
+        failures = asyncio.run(run_sweep(config))
+    except KeyboardInterrupt:
+        print("\nSweep interrupted by the user.")
+        sys.exit(130)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
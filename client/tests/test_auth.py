@@ -0,0 +1,55 @@
+"""Tests for the stand-in's caching bearer token verifier."""
+
+import time
+
+import pytest
+
+jwt = pytest.importorskip("jwt")
+
+from simbridge.standin.auth import TokenVerifier  # pylint: disable=wrong-import-position
+
+SECRET = "s" * 32
+
+
+def _token(secret=SECRET, issuer="simulation-bridge", **claims):
+    now = int(time.time())
+    payload = {"iss": issuer, "iat": now, "exp": now + 60, **claims}
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def test_repeated_token_is_served_from_cache(monkeypatch):
+    verifier = TokenVerifier(SECRET, issuer="simulation-bridge")
+    token = _token(sub="dt")
+    assert verifier.verify(token)["sub"] == "dt"
+    monkeypatch.setattr(jwt, "decode", lambda *args, **kwargs: pytest.fail("decoded again"))
+    assert verifier.verify(token)["sub"] == "dt"
+    assert (verifier.hits, verifier.misses) == (1, 1)
+
+
+@pytest.mark.parametrize("token", [_token(secret="x" * 32), _token(issuer="other"),
+                                   "not-a-token"])
+def test_invalid_tokens_are_refused_and_not_cached(token):
+    verifier = TokenVerifier(SECRET, issuer="simulation-bridge")
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Invalid token"):
+            verifier.verify(token)
+    assert (verifier.hits, verifier.misses) == (0, 2)
+
+
+def test_cached_entry_expires_at_max_token_age(monkeypatch):
+    verifier = TokenVerifier(SECRET, max_token_age=10)
+    token = _token()
+    verifier.verify(token)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    with pytest.raises(ValueError, match="maximum token age"):
+        verifier.verify(token)
+    assert verifier.hits == 0
+
+
+def test_cache_evicts_least_recently_used():
+    verifier = TokenVerifier(SECRET, cache_size=2)
+    first, second, third = (_token(sub=name) for name in "abc")
+    for token in (first, second, first, third, first, second):
+        verifier.verify(token)
+    assert (verifier.hits, verifier.misses) == (2, 4)
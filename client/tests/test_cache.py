@@ -0,0 +1,39 @@
+"""Tests for the SQLite result cache."""
+
+from simbridge.cache import ResultCache
+
+COMPLETED = {"status": "completed", "data": {"o1": 1.0}}
+
+
+def _simulation(index):
+    return {"simulator": "matlab", "type": "batch", "file": "Sim.m", "inputs": {"i1": index}}
+
+
+def _stored(cache):
+    return cache._db.execute(  # pylint: disable=protected-access
+        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+
+
+def test_totals_track_puts_replacements_and_evictions(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    for index in range(25):
+        cache.put(_simulation(index), COMPLETED)
+    cache.put(_simulation(24), {**COMPLETED, "data": {"o1": 10.0}})
+    assert (cache._count, cache._bytes) == _stored(cache)  # pylint: disable=protected-access
+    assert cache._count <= 10  # pylint: disable=protected-access
+    cache.close()
+
+    reopened = ResultCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    assert (reopened._count, reopened._bytes) == _stored(reopened)  # pylint: disable=protected-access
+    reopened.close()
+
+
+def test_buffered_access_times_drive_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), max_entries=3, access_batch=100)
+    for index in range(3):
+        cache.put(_simulation(index), COMPLETED)
+    assert cache.get(_simulation(0)) == COMPLETED
+    cache.put(_simulation(3), COMPLETED)  # evicts down to 2 entries, least recently used first
+    assert cache.get(_simulation(0)) == COMPLETED
+    assert cache.get(_simulation(1)) is None
+    cache.close()
@@ -0,0 +1,42 @@
+"""Tests for the transport-independent SimulationClient."""
+
+import asyncio
+
+from simbridge import SimulationClient, Transport
+
+
+class SilentTransport(Transport):
+    """Accept every request and never answer."""
+
+    def __init__(self):
+        super().__init__({})
+        self.sent = []
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def send(self, request, stream, body=None):
+        self.sent.append(stream)
+
+
+def test_concurrent_submits_of_one_request_id():
+    async def scenario():
+        transport = SilentTransport()
+        async with SimulationClient(transport, window=2) as client:
+            held = [await client.submit({"simulation": {}}) for _ in range(2)]
+            request = {"simulation": {"request_id": "dup"}}
+            waiting = [asyncio.ensure_future(client.submit(request)) for _ in range(2)]
+            await asyncio.sleep(0)
+            for stream in held:
+                stream.fail(RuntimeError("done"))
+            results = await asyncio.gather(*waiting, return_exceptions=True)
+            return results, client.in_flight, transport.sent
+
+    results, in_flight, sent = asyncio.run(scenario())
+    errors = [result for result in results if isinstance(result, Exception)]
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+    assert in_flight == 1 and len(sent) == 3
+
@@ -0,0 +1,64 @@
+"""Tests for content-type codec selection and request id peeking."""
+
+import json
+
+import pytest
+
+from simbridge import codec
+from simbridge.codec import JSON, MSGPACK, YAML, CodecError, peek_request_ids
+
+MESSAGE = {"request_id": "r1", "status": "streaming", "data": {"x": 1.5, "pos": [1, 2]}}
+
+
+@pytest.mark.parametrize("content_type, expected", [
+    ("application/json", JSON), ("application/json; charset=utf-8", JSON),
+    ("APPLICATION/X-NDJSON", JSON), ("text/yaml", YAML), ("application/x-yaml", YAML),
+    ("application/x-msgpack", MSGPACK), ("text/plain", None), (None, None), ("", None),
+])
+def test_codec_for_resolves_aliases_and_parameters(content_type, expected):
+    found = codec.codec_for(content_type)
+    assert (found.content_type if found else None) == expected
+
+
+@pytest.mark.parametrize("content_type", [JSON, YAML])
+def test_round_trip(content_type):
+    assert codec.decode(codec.encode(MESSAGE, content_type), content_type) == MESSAGE
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    assert codec.decode(codec.encode(MESSAGE, MSGPACK), MSGPACK) == MESSAGE
+
+
+def test_decode_sniffs_untyped_bodies(monkeypatch):
+    yaml_decode = codec.CODECS[YAML]._decode  # pylint: disable=protected-access
+    calls = []
+    monkeypatch.setattr(codec.CODECS[YAML], "_decode",
+                        lambda body: calls.append(body) or yaml_decode(body))
+    assert codec.decode(json.dumps(MESSAGE).encode()) == MESSAGE
+    assert not calls
+    assert codec.decode(b"request_id: r1\nstatus: completed\n") == {
+        "request_id": "r1", "status": "completed"}
+    assert codec.decode(b"{request_id: r1}") == {"request_id": "r1"}  # YAML flow mapping
+    assert len(calls) == 2
+
+
+def test_declared_content_type_is_not_sniffed():
+    with pytest.raises(CodecError):
+        codec.decode(b"request_id: r1", JSON)
+    with pytest.raises(CodecError, match="No codec"):
+        codec.encode(MESSAGE, "text/plain")
+
+
+@pytest.mark.parametrize("body, content_type, expected", [
+    (b'{"request_id": "r1", "data": {}}', None, {"r1"}),
+    (b'{"request_id":"r1"}', "application/json", {"r1"}),
+    (b'{"results": [{"request_id": "a"}, {"request_id": "b"}]}', None, {"a", "b"}),
+    (b'{"request_id": "a\\"b"}', None, None),
+    (b'{"request_id": 7}', None, None),
+    (b'{"status": "completed"}', None, None),
+    (b'request_id: r1', None, None),
+    (b'{"request_id": "r1"}', YAML, None),
+])
+def test_peek_request_ids(body, content_type, expected):
+    assert peek_request_ids(body, content_type) == expected
@@ -0,0 +1,40 @@
+"""Tests for the columnar output sink."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from simbridge.columnar import ColumnarSink, load_columns  # pylint: disable=wrong-import-position
+
+
+def test_sections_and_bookkeeping_columns_do_not_collide():
+    sink = ColumnarSink()
+    sink.append({"request_id": "r1", "sequence": 0,
+                 "data": {"request": 7, "sequence": 8, "x": 1, "pos": [2, 3]}})
+    sink.append({"request_id": "r1", "sequence": 1, "outputs": {"x": 4}})
+    columns = sink.columns()
+    assert sorted(columns) == ["data.pos.0", "data.pos.1", "data.request", "data.sequence",
+                               "data.x", "outputs.x", "request", "sequence"]
+    assert columns["request"].tolist() == [0, 0]
+    assert columns["sequence"].tolist() == [0, 1]
+    assert columns["data.x"][0] == 1 and np.isnan(columns["data.x"][1])
+    assert np.isnan(columns["outputs.x"][0]) and columns["outputs.x"][1] == 4
+
+
+def test_messages_without_numeric_output_are_skipped():
+    sink = ColumnarSink()
+    assert not sink.append({"request_id": "r1", "status": "running", "data": {"note": "x"}})
+    assert sink.rows == 0
+
+
+def test_load_columns_merges_chunks(tmp_path):
+    sink = ColumnarSink(str(tmp_path), chunk_rows=2)
+    for index, request_id in enumerate(["a", "b", "a", "c", "b"]):
+        sink.append({"request_id": request_id, "sequence": index, "data": {"x": index}})
+    sink.append({"request_id": "c", "outputs": {"y": 9}})
+    sink.close()
+    columns, request_ids = load_columns(str(tmp_path))
+    assert len(list(tmp_path.glob("part-*.npz"))) == 3
+    assert columns["data.x"][:5].tolist() == [0, 1, 2, 3, 4]
+    assert np.isnan(columns["data.x"][5]) and columns["outputs.y"][5] == 9
+    assert [request_ids[int(code)] for code in columns["request"]] == ["a", "b", "a", "c", "b", "c"]
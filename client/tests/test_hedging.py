@@ -0,0 +1,67 @@
+"""Tests for hedged submission across two clients."""
+
+import asyncio
+
+from simbridge import HedgedClient, SimulationClient, Transport
+
+
+class ScriptedTransport(Transport):
+    """Answer every request with *script*, a list of ``(delay, status)``."""
+
+    def __init__(self, script, gate=None):
+        super().__init__({})
+        self.script = script
+        self.gate = gate
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def send(self, request, stream, body=None):
+        if self.gate is not None:
+            await self.gate.wait()
+        asyncio.ensure_future(self._play(stream))
+
+    async def _play(self, stream):
+        for delay, status in self.script:
+            await asyncio.sleep(delay)
+            stream.push({"request_id": stream.request_id, "status": status})
+
+
+def test_secondary_submitted_after_primary_answered_is_dropped():
+    async def scenario():
+        gate = asyncio.Event()
+        primary = SimulationClient(ScriptedTransport([(0.05, "processing"), (0.5, "completed")]))
+        secondary = SimulationClient(ScriptedTransport([], gate))
+        async with HedgedClient(primary, secondary, budget=0.01) as client:
+            stream = await client.submit({"simulation": {"simulator": "matlab"}})
+            await asyncio.sleep(0.1)  # the primary has answered, the hedge is still pending
+            gate.set()
+            await asyncio.sleep(0.05)
+            secondary_in_flight = secondary.in_flight
+            final = await stream.result(timeout=5)
+            return secondary_in_flight, final, client
+
+    secondary_in_flight, final, client = asyncio.run(scenario())
+    assert secondary_in_flight == 0
+    assert final["status"] == "completed"
+    assert (client.hedged, client.secondary_wins) == (1, 0)
+
+
+def test_hedged_stream_applies_backpressure():
+    async def scenario():
+        script = [(0, "streaming")] * 1000 + [(0, "completed")]
+        primary = SimulationClient(ScriptedTransport(script), stream_buffer=4)
+        secondary = SimulationClient(ScriptedTransport([]))
+        async with HedgedClient(primary, secondary, budget=1) as client:
+            stream = await client.submit({"simulation": {"simulator": "matlab"}})
+            await asyncio.sleep(0.2)
+            lag = stream.lag
+            received = [message["status"] async for message in stream]
+            return lag, received
+
+    lag, received = asyncio.run(scenario())
+    assert lag <= 4
+    assert len(received) == 1001 and received[-1] == "completed"
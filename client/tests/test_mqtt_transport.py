@@ -0,0 +1,220 @@
+"""Tests for the MQTT transport and the in-process stand-in broker."""
+
+import asyncio
+import json
+import struct
+import sys
+import threading
+from pathlib import Path
+
+import paho.mqtt.client as paho
+import pytest
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from simbridge import RequestTemplate, SimulationClient, TransportError
+from simbridge.standin import ResultProfile
+from simbridge.standin.mqtt import (TOPIC_ALIAS, MQTTBrokerShim, _decode_length, _Session,
+                                    read_properties, result_topic, shared_filter, topic_matches)
+from simbridge.transports import mqtt as mqtt_transport
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "mqtt"))
+from mqtt_client import AsyncMQTTClient  # pylint: disable=wrong-import-position,wrong-import-order
+
+REQUEST = {"simulation": {"simulator": "matlab", "type": "streaming",
+                          "file": "SimulationStreaming.m", "client_id": "dt"}}
+
+
+def _config(port, **extra):
+    return {"mqtt": {"host": "127.0.0.1", "port": port, "keepalive": 60, "qos": 0,
+                     "username": "guest", "password": "guest",
+                     "input_topic": "bridge/input", "output_topic": "bridge/output",
+                     **extra}}
+
+
+def test_async_client_decodes_off_network_thread(free_port, monkeypatch):
+    decoded_on = set()
+
+    def recording_decode(payload, content_type=None):
+        decoded_on.add(threading.current_thread().name)
+        return decode(payload, content_type)
+
+    decode = mqtt_transport.decode
+    monkeypatch.setattr(mqtt_transport, "decode", recording_decode)
+
+    async def scenario():
+        broker = MQTTBrokerShim(ResultProfile(steps=3), port=free_port)
+        await broker.start()
+        try:
+            async with AsyncMQTTClient(_config(free_port)) as client:
+                stream = await client.submit(RequestTemplate(REQUEST).build())
+                return await stream.result(timeout=5)
+        finally:
+            await broker.stop()
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 10))["status"] == "completed"
+    assert decoded_on and all(name.startswith("events-mqtt-decode") for name in decoded_on)
+
+
+@pytest.mark.parametrize("template", ["bridge/output/{user}", "bridge/output/{}",
+                                      "bridge/output/{client_id"])
+def test_broker_rejects_invalid_output_topic(template):
+    with pytest.raises(ValueError, match="output_topic"):
+        MQTTBrokerShim(ResultProfile(), output_topic=template)
+
+
+def test_connect_fails_without_broker(free_port):
+    async def scenario():
+        client = SimulationClient("mqtt", _config(free_port))
+        with pytest.raises(TransportError):
+            await client.connect()
+        await client.close()
+
+    before = threading.active_count()
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert threading.active_count() == before
+
+
+def test_connect_times_out_without_connack(free_port):
+    async def scenario():
+        server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", free_port)
+        try:
+            client = SimulationClient("mqtt", _config(free_port, connect_timeout=0.2))
+            with pytest.raises(TransportError, match="CONNACK"):
+                await client.connect()
+        finally:
+            server.close()
+
+    before = threading.active_count()
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert threading.active_count() == before
+
+
+def test_v5_results_on_per_request_topics(free_port):
+    async def scenario():
+        broker = MQTTBrokerShim(ResultProfile(steps=2), port=free_port,
+                                output_topic="bridge/output/{client_id}/{request_id}")
+        await broker.start()
+        try:
+            config = _config(free_port, protocol=5, output_topic="bridge/output/dt/#")
+            async with SimulationClient("mqtt", config) as client:
+                template = RequestTemplate(REQUEST)
+                streams = [await client.submit(template.build(), template) for _ in range(20)]
+                finals = [await stream.result(timeout=5) for stream in streams]
+                sessions = list(broker._sessions)  # pylint: disable=protected-access
+            return finals, [session.alias_maximum for session in sessions]
+        finally:
+            await broker.stop()
+
+    finals, alias_maximums = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert [final["status"] for final in finals] == ["completed"] * 20
+    assert alias_maximums == [0]  # the transport does not accept aliases
+
+
+class _Capture:
+    def __init__(self):
+        self.packets = []
+
+    def write(self, data):
+        self.packets.append(data)
+
+
+def _published(packet):
+    _, offset = _decode_length(packet, 1)
+    (size,) = struct.unpack_from("!H", packet, offset)
+    topic = packet[offset + 2:offset + 2 + size].decode("utf-8")
+    properties, _ = read_properties(packet, offset + 2 + size)
+    return topic, properties.get(TOPIC_ALIAS)
+
+
+def test_standin_recycles_least_recently_used_alias():
+    writer = _Capture()
+    session = _Session(writer)
+    session.version, session.alias_maximum = 5, 2
+    for topic in ["a", "b", "a", "c", "a", "b"]:
+        session.publish(topic, b"{}")
+    assert [_published(packet) for packet in writer.packets] == [
+        ("a", 1), ("b", 2), ("", 1), ("c", 2), ("", 1), ("b", 2)]
+
+
+@pytest.mark.parametrize("topic_filter, topic, expected", [
+    ("bridge/output", "bridge/output", True), ("bridge/+/dt", "bridge/output/dt", True),
+    ("bridge/#", "bridge/output/dt/r1", True), ("bridge/+", "bridge/output/dt", False),
+    ("bridge/output/dt", "bridge/output", False), ("#", "bridge", True),
+])
+def test_topic_matches(topic_filter, topic, expected):
+    assert topic_matches(topic_filter, topic) is expected
+
+
+def test_shared_filters_and_result_topics():
+    assert shared_filter("$share/twins/bridge/output/#") == ("twins", "bridge/output/#")
+    assert shared_filter("bridge/output") == (None, "bridge/output")
+    assert result_topic("out/{client_id}/{request_id}",
+                        {"client_id": "a/b", "request_id": "r+#"}) == "out/a_b/r__"
+
+
+def test_shared_subscription_delivers_round_robin():
+    broker = MQTTBrokerShim(ResultProfile())
+    members = [_Session(_Capture()) for _ in range(2)]
+    plain = _Session(_Capture())
+    for session in members:
+        session.filters.add("$share/twins/bridge/output/#")
+    plain.filters.update({"bridge/output/#", "bridge/+/dt"})
+    broker._sessions = [*members, plain]  # pylint: disable=protected-access
+    for _ in range(4):
+        broker.publish("bridge/output/dt", b"{}")
+    assert [len(session.writer.packets) for session in (*members, plain)] == [2, 2, 4]
+
+
+def _v5_request_reply(port):
+    """Send two requests over an inbound topic alias; return the replies per correlation."""
+    replies = {}
+    done = threading.Event()
+    subscribed = threading.Event()
+
+    def on_message(_client, _userdata, msg):
+        correlation = msg.properties.CorrelationData.decode()
+        replies.setdefault(correlation, []).append((msg.topic, msg.payload))
+        if sum(b'"completed"' in payload for _, payload in sum(replies.values(), [])) == 2:
+            done.set()
+
+    client = paho.Client(client_id="twin", protocol=paho.MQTTv5)
+    client.on_message = on_message
+    client.on_subscribe = lambda *args: subscribed.set()
+    client.connect("127.0.0.1", port)
+    client.loop_start()
+    try:
+        client.subscribe("replies/twin")
+        assert subscribed.wait(5)
+        for index, topic in enumerate(["bridge/input", ""], 1):
+            properties = Properties(PacketTypes.PUBLISH)
+            properties.TopicAlias = 1
+            properties.ResponseTopic = "replies/twin"
+            properties.CorrelationData = f"c-{index}".encode()
+            properties.ContentType = "application/json"
+            request = RequestTemplate(REQUEST).build(f"r{index}")
+            client.publish(topic, RequestTemplate(REQUEST).encode(request),
+                           properties=properties)
+        assert done.wait(5)
+    finally:
+        client.loop_stop()
+        client.disconnect()
+    return replies
+
+
+def test_v5_standin_answers_on_response_topic_with_correlation(free_port):
+    async def scenario():
+        broker = MQTTBrokerShim(ResultProfile(steps=2), port=free_port)
+        await broker.start()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, _v5_request_reply, free_port)
+        finally:
+            await broker.stop()
+
+    replies = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert sorted(replies) == ["c-1", "c-2"]
+    for index, correlation in enumerate(["c-1", "c-2"], 1):
+        assert {topic for topic, _ in replies[correlation]} == {"replies/twin"}
+        assert [json.loads(payload)["request_id"] for _, payload in replies[correlation]] == \
+            [f"r{index}"] * 3
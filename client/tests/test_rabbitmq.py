@@ -0,0 +1,160 @@
+"""Tests for the RabbitMQ client and transport against the in-process fake broker."""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+from simbridge import RequestTemplate, SimulationClient, TransportError
+from simbridge.standin import ResultProfile
+from simbridge.standin.amqp import connection_factory
+
+CLIENT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(CLIENT_DIR / "rabbitmq"))
+from rabbitmq_client import PublishError, RabbitMQClient  # pylint: disable=wrong-import-position,wrong-import-order
+
+REQUEST = {"simulation": {"simulator": "matlab", "type": "streaming",
+                          "file": "SimulationStreaming.m", "client_id": "dt"}}
+
+
+def _config(reconnect=True, **consumer):
+    with open(CLIENT_DIR / "rabbitmq" / "rabbitmq_use.yaml", encoding="utf-8") as file:
+        config = yaml.safe_load(file)
+    config["consumer"].update(consumer)
+    config["rabbitmq"]["reconnect"] = {"enabled": reconnect, "initial_delay": 30}
+    return config
+
+
+def _drop_connection(manager):
+    manager.call_soon(manager.connection.close)
+    deadline = time.monotonic() + 5
+    while manager.channel is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_client_confirms_requests_and_receives_results():
+    completed = threading.Event()
+    results = []
+
+    def on_result(source, result):
+        results.append((source, result["status"]))
+        if sum(status == "completed" for _, status in results) == 20:
+            completed.set()
+
+    client = RabbitMQClient(_config(), on_result=on_result,
+                            connection_factory=connection_factory(ResultProfile(steps=3)))
+    client.start(timeout=5)
+    try:
+        template = RequestTemplate(REQUEST)
+        futures = [client.send_simulation_request(template.build(), template)
+                   for _ in range(20)]
+        assert all(future.result(timeout=5) for future in futures)
+        assert completed.wait(5)
+    finally:
+        client.stop()
+    assert {source for source, _ in results} == {"matlab"}
+
+
+def test_transport_streams_results():
+    async def scenario():
+        factory = connection_factory(ResultProfile(steps=3))
+        async with SimulationClient("rabbitmq", _config(), connection_factory=factory) as client:
+            template = RequestTemplate(REQUEST)
+            streams = [await client.submit(template.build(), template) for _ in range(5)]
+            return [(await stream.result(timeout=5))["status"] for stream in streams]
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 10)) == ["completed"] * 5
+
+
+def test_stop_fails_requests_queued_while_reconnecting():
+    client = RabbitMQClient(_config(), connection_factory=connection_factory(ResultProfile()))
+    client.start(timeout=5)
+    _drop_connection(client.amqp)
+    future = client.send_simulation_request(RequestTemplate(REQUEST).build())
+    client.stop()
+    assert isinstance(future.exception(timeout=5), PublishError)
+    assert client._outstanding._value == 1024  # pylint: disable=protected-access
+
+
+def test_publish_after_terminal_loss_fails():
+    client = RabbitMQClient(_config(reconnect=False),
+                            connection_factory=connection_factory(ResultProfile()))
+    client.start(timeout=5)
+    _drop_connection(client.amqp)
+    client.amqp.thread.join(5)
+    future = client.send_simulation_request(RequestTemplate(REQUEST).build())
+    assert isinstance(future.exception(timeout=5), PublishError)
+    client.stop()
+
+
+def test_transport_send_after_terminal_loss_fails():
+    async def scenario():
+        factory = connection_factory(ResultProfile())
+        async with SimulationClient("rabbitmq", _config(reconnect=False),
+                                    connection_factory=factory) as client:
+            manager = client.transport.amqp
+            await asyncio.get_running_loop().run_in_executor(None, _drop_connection, manager)
+            await asyncio.get_running_loop().run_in_executor(None, manager.thread.join, 5)
+            with pytest.raises(TransportError):
+                await asyncio.wait_for(client.submit(RequestTemplate(REQUEST).build()), 5)
+
+    asyncio.run(scenario())
+
+
+def test_adapted_prefetch_reaches_running_consumer():
+    client = RabbitMQClient(_config(prefetch=256, min_prefetch=16),
+                            connection_factory=connection_factory(ResultProfile()))
+    client.start(timeout=5)
+    try:
+        channel = client.amqp.channel
+        assert channel.effective_prefetch() == 256
+        client.prefetch.latency = 1.0  # slow handlers: shrink the buffer
+        client.prefetch._last_update -= 2  # pylint: disable=protected-access
+        applied = threading.Event()
+        client.amqp.call_soon(client._adapt_prefetch)  # pylint: disable=protected-access
+        client.amqp.call_soon(applied.set)
+        assert applied.wait(5)
+        assert channel.effective_prefetch() == 16
+    finally:
+        client.stop()
+
+
+class _RecordingChannel:
+    is_open = True
+
+    def __init__(self):
+        self.calls = []
+
+    def basic_ack(self, delivery_tag=0, multiple=False):
+        self.calls.append(("ack", delivery_tag, multiple))
+
+    def basic_nack(self, delivery_tag=0, multiple=False, requeue=True):
+        self.calls.append(("nack", delivery_tag, multiple, requeue))
+
+    def basic_qos(self, **kwargs):
+        pass
+
+
+def test_worker_acks_are_flushed_cumulatively():
+    client = RabbitMQClient(_config(), connection_factory=connection_factory(ResultProfile()))
+    channel = client.amqp.channel = _RecordingChannel()
+    generation = client._channel_generation  # pylint: disable=protected-access
+
+    def finish(*tags, handled=True, stale=False):
+        for tag in tags:
+            client._acks.put((generation - stale, tag, handled))  # pylint: disable=protected-access
+        client._flush_acks()  # pylint: disable=protected-access
+        calls, channel.calls = channel.calls, []
+        return calls
+
+    assert finish(2, 3) == []  # waits for tag 1
+    assert finish(1) == [("ack", 3, True)]
+    assert finish(5) == []
+    assert finish(4, handled=False) == [("nack", 4, False, False), ("ack", 5, True)]
+    assert finish(6, handled=False) == [("nack", 6, False, False)]
+    assert finish(7, stale=True) == []  # from a channel that has since been replaced
+    assert finish(7) == [("ack", 7, True)]
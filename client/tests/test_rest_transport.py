@@ -0,0 +1,61 @@
+"""Tests for the REST transport against the in-process stand-in."""
+
+import asyncio
+
+import pytest
+
+from simbridge import RequestTemplate, SimulationClient
+from simbridge.standin import ResultProfile
+from simbridge.standin.rest import RESTStandIn
+
+SECRET = "0123456789012345678901234567890123"
+REQUEST = {"simulation": {"simulator": "matlab", "type": "streaming",
+                          "file": "SimulationStreaming.m", "client_id": "dt"}}
+
+
+def _config(port, **extra):
+    return {"url": f"http://127.0.0.1:{port}/message", "secret": SECRET, **extra}
+
+
+async def _with_standin(port, scenario):
+    standin = RESTStandIn(ResultProfile(steps=5), port=port)
+    await standin.start()
+    try:
+        return await asyncio.wait_for(scenario(), 10)
+    finally:
+        await standin.stop()
+
+
+def test_submit_before_connect(free_port):
+    client = SimulationClient("rest", _config(free_port))
+    with pytest.raises(RuntimeError, match="connect"):
+        asyncio.run(client.submit(RequestTemplate(REQUEST).build()))
+
+
+def test_close_before_connect(free_port):
+    asyncio.run(SimulationClient("rest", _config(free_port)).close())
+
+
+def test_result_on_bounded_unconsumed_stream(free_port):
+    async def scenario():
+        async with SimulationClient("rest", _config(free_port), stream_buffer=2) as client:
+            stream = await client.submit(RequestTemplate(REQUEST).build())
+            return await stream.result(timeout=5)
+
+    assert asyncio.run(_with_standin(free_port, scenario))["status"] == "completed"
+
+
+def test_bulk_stream_not_stalled_by_unconsumed_request(free_port):
+    async def scenario():
+        config = _config(free_port, bulk={"enabled": True, "linger": 0.05,
+                                          "url": f"http://127.0.0.1:{free_port}/message/bulk"})
+        template = RequestTemplate(REQUEST)
+        async with SimulationClient("rest", config, stream_buffer=2) as client:
+            first = await client.submit(template.build())
+            second = await client.submit(template.build())
+            received = [message["status"] async for message in second]
+            return received, first.lag
+
+    received, first_lag = asyncio.run(_with_standin(free_port, scenario))
+    assert received[-1] == "completed"
+    assert first_lag <= 3  # the unconsumed stream stays bounded (plus its final message)
@@ -0,0 +1,21 @@
+"""Tests for the stand-in bridge's synthetic results and request parsing."""
+
+from datetime import datetime, timezone
+
+from simbridge.standin import ResultProfile
+from simbridge.standin.results import synthetic_results
+
+REQUEST = {"bridge_meta": {"protocol": "rest"},
+           "simulation": {"request_id": "r1", "client_id": "dt", "simulator": "matlab",
+                          "type": "streaming", "file": "SimulationStreaming.m"}}
+
+
+def test_results_echo_envelope_with_utc_timestamps():
+    messages = [message for _, message in synthetic_results(REQUEST, ResultProfile(steps=2))]
+    assert [message["status"] for message in messages] == ["streaming", "streaming", "completed"]
+    for message in messages:
+        assert message["bridge_meta"] == {"protocol": "rest"}
+        assert (message["request_id"], message["destinations"]) == ("r1", ["dt"])
+        stamp = datetime.strptime(message["timestamp"], "%Y-%m-%dT%H:%M:%SZ")
+        skew = datetime.now(timezone.utc) - stamp.replace(tzinfo=timezone.utc)
+        assert abs(skew.total_seconds()) < 5
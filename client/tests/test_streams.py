@@ -0,0 +1,64 @@
+"""Tests for bounded result streams."""
+
+import asyncio
+
+from simbridge.streams import ResultStream
+
+
+def _streaming(sequence):
+    return {"status": "streaming", "sequence": sequence}
+
+
+def test_result_on_bounded_unconsumed_stream():
+    async def scenario():
+        stream = ResultStream("r", maxsize=2)
+
+        async def transport():
+            for sequence in range(5):
+                await stream.writable()
+                stream.push(_streaming(sequence))
+            stream.push({"status": "completed"})
+
+        task = asyncio.ensure_future(transport())
+        await asyncio.sleep(0)
+        final = await stream.result(timeout=1)
+        await task
+        return final, stream.lag
+
+    final, lag = asyncio.run(scenario())
+    assert final["status"] == "completed"
+    assert lag == 1  # only the terminal message is kept
+
+
+def test_result_while_iterating_keeps_progress():
+    async def scenario():
+        stream = ResultStream("r", maxsize=2)
+        received = []
+
+        async def consume():
+            async for message in stream:
+                received.append(message["status"])
+
+        consumer = asyncio.ensure_future(consume())
+        await asyncio.sleep(0)
+        for sequence in range(3):
+            await stream.writable()
+            stream.push(_streaming(sequence))
+        stream.push({"status": "completed"})
+        await stream.result(timeout=1)
+        await consumer
+        return received
+
+    assert asyncio.run(scenario()) == ["streaming"] * 3 + ["completed"]
+
+
+def test_overflow_policies():
+    async def scenario(overflow):
+        stream = ResultStream("r", maxsize=3, overflow=overflow)
+        for sequence in range(6):
+            stream.push(_streaming(sequence))
+        stream.push({"status": "completed"})
+        return [message.get("sequence") async for message in stream], stream.dropped
+
+    assert asyncio.run(scenario("drop-oldest")) == ([3, 4, 5, None], 3)
+    assert asyncio.run(scenario("coalesce")) == ([0, 1, 5, None], 3)
@@ -0,0 +1,102 @@
+"""Tests for sweep specifications and their expansion."""
+
+import asyncio
+
+import pytest
+
+from simbridge.sweep import Sweep, SweepError, run_window
+
+
+@pytest.mark.parametrize("mode", ["random", "lhs"])
+@pytest.mark.parametrize("low, high", [(1, 3), (-3, -1), (-1, 1)])
+def test_integer_sampling_covers_both_endpoints(mode, low, high):
+    sweep = Sweep({"mode": mode, "samples": 300, "seed": 7,
+                   "parameters": {"n": {"min": low, "max": high, "integer": True}}})
+    seen = {point["n"] for point in sweep.points_iter()}
+    assert seen == set(range(low, high + 1))
+
+
+def test_integer_range_without_integer_is_rejected():
+    with pytest.raises(SweepError):
+        Sweep({"mode": "random", "samples": 1,
+               "parameters": {"n": {"min": 1.2, "max": 1.8, "integer": True}}})
+
+
+def test_grid_expands_cartesian_product_lazily():
+    sweep = Sweep({"mode": "grid", "parameters": {
+        "a": [1, 2], "b": {"min": 0, "max": 1, "steps": 3}, "c": {"values": ["x"]}}})
+    points = sweep.points_iter()
+    assert next(points) == {"a": 1, "b": 0.0, "c": "x"}
+    assert len(sweep) == 6
+    assert [(p["a"], p["b"]) for p in sweep.points_iter()] == [
+        (1, 0.0), (1, 0.5), (1, 1.0), (2, 0.0), (2, 0.5), (2, 1.0)]
+
+
+def test_list_yields_given_points():
+    points = [{"a": 1}, {"a": 2, "b": 3}]
+    sweep = Sweep({"mode": "list", "points": points})
+    assert len(sweep) == 2 and list(sweep.points_iter()) == points
+
+
+def test_random_is_seeded_and_stays_in_range():
+    spec = {"mode": "random", "samples": 200, "seed": 3,
+            "parameters": {"x": {"min": -1, "max": 2}, "k": ["a", "b"]}}
+    first = list(Sweep(spec).points_iter())
+    assert first == list(Sweep(spec).points_iter())
+    assert len(first) == 200
+    assert all(-1 <= p["x"] < 2 for p in first)
+    assert {p["k"] for p in first} == {"a", "b"}
+
+
+def test_lhs_puts_one_sample_in_every_stratum():
+    samples = 50
+    sweep = Sweep({"mode": "lhs", "samples": samples, "seed": 1,
+                   "parameters": {"x": {"min": 0, "max": 10}, "y": {"min": 5, "max": 6}}})
+    points = list(sweep.points_iter())
+    for name, low, width in (("x", 0, 10), ("y", 5, 1)):
+        strata = sorted(int((p[name] - low) / width * samples) for p in points)
+        assert strata == list(range(samples))
+
+
+def test_requests_splice_points_into_base_inputs():
+    base = {"simulation": {"simulator": "matlab", "type": "batch", "file": "f.m",
+                           "inputs": {"a": 0, "fixed": True}}}
+    sweep = Sweep({"mode": "list", "points": [{"a": 1}, {"a": 2}]})
+    requests = list(sweep.requests(base, "s1"))
+    assert [r["simulation"]["request_id"] for r in requests] == ["s1-000000", "s1-000001"]
+    assert [r["simulation"]["inputs"] for r in requests] == [
+        {"a": 1, "fixed": True}, {"a": 2, "fixed": True}]
+
+
+@pytest.mark.parametrize("spec", [
+    {"mode": "spiral", "parameters": {"a": [1]}},
+    {"mode": "grid"},
+    {"mode": "grid", "parameters": {"a": {"min": 0, "max": 1}}},
+    {"mode": "grid", "parameters": {"a": {"min": 0, "max": 1, "steps": 0}}},
+    {"mode": "list", "points": []},
+    {"mode": "random", "parameters": {"a": [1]}},
+    {"mode": "lhs", "samples": 2, "parameters": {"a": {"min": 2, "max": 1}}},
+    {"mode": "random", "samples": 2, "parameters": {"a": {"max": 1}}},
+])
+def test_invalid_specifications_are_rejected(spec):
+    with pytest.raises(SweepError):
+        Sweep(spec)
+
+
+def test_run_window_bounds_in_flight_requests():
+    in_flight, peak, done = 0, 0, []
+
+    async def submit(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001 * (request % 3))
+        in_flight -= 1
+        if request == 4:
+            raise RuntimeError("boom")
+        return {"status": "completed"}
+
+    failures = asyncio.run(run_window(iter(range(10)), submit, 3,
+                                      lambda index, *_: done.append(index)))
+    assert (failures, peak) == (1, 3)
+    assert sorted(done) == list(range(10))
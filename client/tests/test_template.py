@@ -0,0 +1,72 @@
+"""Tests for pre-compiled request templates."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from simbridge.template import RequestTemplate, TemplateError, routing_headers
+
+SIMULATION_YAML = Path(__file__).resolve().parents[1] / "simulation.yaml"
+REQUEST = {"bridge_meta": {"protocol": "rest"},
+           "simulation": {"request_id": "r0", "client_id": "dt", "simulator": "matlab",
+                          "type": "batch", "file": "SimulationBatch.m",
+                          "inputs": {"i1": 1, "i2": [1, 2], "label": "é\"x"},
+                          "outputs": {"o1": "y"}}}
+
+
+def _check(template, request):
+    assert template.encode(request) == json.dumps(request).encode("utf-8")
+
+
+@pytest.mark.parametrize("inputs", [None, {"i1": 0.5}, {"i3": {"nested": True}},
+                                    {"i2": [3], "label": None}])
+def test_encode_matches_json_dumps(inputs):
+    template = RequestTemplate(REQUEST)
+    request = template.build(inputs=inputs)
+    _check(template, request)
+    assert request["simulation"]["request_id"] != "r0"
+    assert request["simulation"]["timestamp"].endswith("Z")
+
+
+def test_encode_splices_overridden_fields():
+    template = RequestTemplate(REQUEST)
+    request = template.build("r1", client_id="other", timeout=5)
+    decoded = json.loads(template.encode(request))
+    assert decoded["simulation"]["request_id"] == "r1"
+    assert (decoded["simulation"]["client_id"], decoded["simulation"]["timeout"]) == ("other", 5)
+    _check(template, request)
+
+
+def test_encode_accepts_mutated_and_foreign_requests():
+    template = RequestTemplate(REQUEST)
+    request = template.build("r1")
+    request["simulation"]["inputs"] = dict(request["simulation"]["inputs"], i1=2)
+    request["bridge_meta"] = {"protocol": "mqtt"}
+    _check(template, request)
+    _check(template, {"simulation": {"file": "Other.m", "inputs": {"i1": 3}}})
+
+
+def test_from_file_builds_valid_requests():
+    template = RequestTemplate.from_file(str(SIMULATION_YAML))
+    request = template.build("r1")
+    assert json.loads(template.encode(request))["simulation"]["request_id"] == "r1"
+
+
+@pytest.mark.parametrize("request_, message", [
+    ({}, "simulation"),
+    ({"simulation": {"simulator": "matlab", "type": "batch"}}, "file"),
+    ({"simulation": {"simulator": "matlab", "type": "live", "file": "f.m"}}, "type"),
+    ({"simulation": {"simulator": "matlab", "type": "batch", "file": "f.m", "inputs": [1]}},
+     "inputs"),
+])
+def test_invalid_envelopes_are_rejected(request_, message):
+    with pytest.raises(TemplateError, match=message):
+        RequestTemplate(request_)
+
+
+def test_routing_headers():
+    request = RequestTemplate(REQUEST).build("r1")
+    assert routing_headers(request) == {"request_id": "r1", "client_id": "dt",
+                                        "simulator": "matlab", "type": "batch",
+                                        "bridge_meta": '{"protocol": "rest"}'}